@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Time breadth-first search as its frontier grows,
+with `pacai.util.queue.Queue` and with the list-backed queue it replaced.
+
+The search problem is a complete binary tree searched for its last node,
+so the frontier ends up holding about half of the nodes.
+The list-backed queue inserts at the front of a list (O(n) per push),
+so its times grow quadratically while the deque-backed queue grows linearly.
+(On the pacman layouts, frontiers only reach a few thousand entries,
+where the difference is lost in the cost of generating successors.)
+"""
+
+import sys
+import time
+
+from pacai.core.search.problem import SearchProblem
+from pacai.student import search
+from pacai.util import queue
+
+DEFAULT_DEPTHS = [14, 15, 16, 17]
+
+class ListQueue(object):
+    """
+    The list-backed queue that `pacai.util.queue.Queue` used to be.
+    """
+
+    def __init__(self):
+        self.list = []
+
+    def push(self, item):
+        self.list.insert(0, item)
+
+    def pop(self):
+        return self.list.pop()
+
+    def isEmpty(self):
+        return len(self.list) == 0
+
+    def __len__(self):
+        return len(self.list)
+
+class TreeSearchProblem(SearchProblem):
+    """
+    A complete binary tree of the given depth, nodes are numbered in breadth-first order.
+    The goal is the last node, so every node is generated.
+    """
+
+    def __init__(self, depth):
+        super().__init__()
+
+        self.numNodes = 2 ** (depth + 1) - 1
+
+    def actionsCost(self, actions):
+        return len(actions)
+
+    def isGoal(self, state):
+        return state == self.numNodes - 1
+
+    def startingState(self):
+        return 0
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+
+        successors = []
+        for child in (2 * state + 1, 2 * state + 2):
+            if (child < self.numNodes):
+                successors.append((child, child % 2, 1))
+
+        return successors
+
+def timeSearch(depth, queueClass):
+    search.Queue = queueClass
+
+    try:
+        problem = TreeSearchProblem(depth)
+
+        start = time.perf_counter()
+        search.breadthFirstSearch(problem)
+        return time.perf_counter() - start
+    finally:
+        search.Queue = queue.Queue
+
+def main(depths):
+    print('%8s  %12s  %12s' % ('nodes', 'list (s)', 'deque (s)'))
+
+    for depth in depths:
+        listTime = timeSearch(depth, ListQueue)
+        dequeTime = timeSearch(depth, queue.Queue)
+
+        print('%8d  %12.4f  %12.4f' % (2 ** (depth + 1) - 1, listTime, dequeTime))
+
+if __name__ == '__main__':
+    depths = [int(arg) for arg in sys.argv[1:]]
+    if (len(depths) == 0):
+        depths = DEFAULT_DEPTHS
+
+    main(depths)
@@ -4,6 +4,10 @@ from pacai.agents.base import BaseAgent
 from pacai.core import distanceCalculator
 from pacai.util import util
 
+# The most time (in seconds) to spend computing maze distances in registerInitialState.
+# Whatever is left is computed a little at a time (timeForComputing) in each getAction.
+STARTUP_TIME_FOR_COMPUTING = 10.0
+
 class CaptureAgent(BaseAgent):
     """
     A base class for capture agents.
@@ -35,12 +39,17 @@ class CaptureAgent(BaseAgent):
         """
         This method handles the initial setup of the agent and populates useful fields,
         such as the team the agent is on and the `pacai.core.distanceCalculator.Distancer`.
+
+        On very large layouts, maze distances may not be done by the time this returns.
+        Until they are, the distancer will answer some queries with the manhattan distance
+        (see `pacai.core.distanceCalculator.Distancer.getProgress`).
         """
 
         self.red = gameState.isOnRedTeam(self.index)
-        self.distancer = distanceCalculator.Distancer(gameState.getInitialLayout())
+        self.distancer = distanceCalculator.Distancer(gameState.getInitialLayout(),
+                mode = distanceCalculator.MODE_INCREMENTAL)
 
-        self.distancer.getMazeDistances()
+        self.distancer.computeMazeDistances(STARTUP_TIME_FOR_COMPUTING)
 
     def final(self, gameState):
         self.observationHistory = []
@@ -60,10 +69,14 @@ class CaptureAgent(BaseAgent):
         It takes care of appending the current state on to your observation history
         (so you have a record of the game states of the game) and will call your
         `CaptureAgent.chooseAction` method if you're in a proper state.
+        Any maze distances that are still missing get timeForComputing seconds of work first.
         """
 
         self.observationHistory.append(gameState)
 
+        if (self.distancer is not None and self.distancer.getProgress() < 1.0):
+            self.distancer.computeMazeDistances(self.timeForComputing)
+
         myState = gameState.getAgentState(self.index)
         myPos = myState.getPosition()
 
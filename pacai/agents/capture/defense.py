@@ -11,10 +11,10 @@ class DefensiveReflexAgent(ReflexCaptureAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index)
 
-    def getFeatures(self, gameState, action):
+    def getFeatures(self, gameState, action, successors = None):
         features = {}
 
-        successor = self.getSuccessor(gameState, action)
+        successor = self.getSuccessor(gameState, action, successors)
         myState = successor.getAgentState(self.index)
         myPos = myState.getPosition()
 
@@ -29,7 +29,7 @@ class DefensiveReflexAgent(ReflexCaptureAgent):
         features['numInvaders'] = len(invaders)
 
         if (len(invaders) > 0):
-            dists = [self.getMazeDistance(myPos, a.getPosition()) for a in invaders]
+            dists = self.distancer.getDistances(myPos, [a.getPosition() for a in invaders])
             features['invaderDistance'] = min(dists)
 
         if (action == Directions.STOP):
@@ -10,9 +10,9 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index)
 
-    def getFeatures(self, gameState, action):
+    def getFeatures(self, gameState, action, successors = None):
         features = {}
-        successor = self.getSuccessor(gameState, action)
+        successor = self.getSuccessor(gameState, action, successors)
         features['successorScore'] = self.getScore(successor)
 
         # Compute distance to the nearest food.
@@ -21,7 +21,7 @@ class OffensiveReflexAgent(ReflexCaptureAgent):
         # This should always be True, but better safe than sorry.
         if (len(foodList) > 0):
             myPos = successor.getAgentState(self.index).getPosition()
-            minDistance = min([self.getMazeDistance(myPos, food) for food in foodList])
+            minDistance = min(self.distancer.getDistances(myPos, foodList))
             features['distanceToFood'] = minDistance
 
         return features
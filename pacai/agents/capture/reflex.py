@@ -16,12 +16,15 @@ class ReflexCaptureAgent(CaptureAgent):
     def chooseAction(self, gameState):
         """
         Picks among the actions with the highest return from `ReflexCaptureAgent.evaluate`.
+        Every action is expanded at once, and the successors are passed down to
+        `ReflexCaptureAgent.getSuccessor`.
         """
 
         actions = gameState.getLegalActions(self.index)
+        successors = dict(gameState.generateSuccessors(self.index, actions))
 
         start = time.time()
-        values = [self.evaluate(gameState, a) for a in actions]
+        values = [self.evaluate(gameState, a, successors) for a in actions]
         logging.debug('evaluate() time for agent %d: %.4f' % (self.index, time.time() - start))
 
         maxValue = max(values)
@@ -29,12 +32,19 @@ class ReflexCaptureAgent(CaptureAgent):
 
         return random.choice(bestActions)
 
-    def getSuccessor(self, gameState, action):
+    def getSuccessor(self, gameState, action, successors = None):
         """
         Finds the next successor which is a grid position (location tuple).
+        If given, the successor is taken from the already expanded {action: successor}.
         """
 
-        successor = gameState.generateSuccessor(self.index, action)
+        successor = None
+        if (successors is not None):
+            successor = successors.get(action)
+
+        if (successor is None):
+            successor = gameState.generateSuccessor(self.index, action)
+
         pos = successor.getAgentState(self.index).getPosition()
 
         if (pos != util.nearestPoint(pos)):
@@ -43,24 +53,26 @@ class ReflexCaptureAgent(CaptureAgent):
         else:
             return successor
 
-    def evaluate(self, gameState, action):
+    def evaluate(self, gameState, action, successors = None):
         """
         Computes a linear combination of features and feature weights.
         """
 
-        features = self.getFeatures(gameState, action)
+        features = self.getFeatures(gameState, action, successors)
         weights = self.getWeights(gameState, action)
         stateEval = sum(features[feature] * weights[feature] for feature in features)
 
         return stateEval
 
-    def getFeatures(self, gameState, action):
+    def getFeatures(self, gameState, action, successors = None):
         """
         Returns a dict of features for the state.
         The keys match up with the return from `ReflexCaptureAgent.getWeights`.
+        The successors are the ones expanded by `ReflexCaptureAgent.chooseAction` (if any),
+        pass them on to `ReflexCaptureAgent.getSuccessor`.
         """
 
-        successor = self.getSuccessor(gameState, action)
+        successor = self.getSuccessor(gameState, action, successors)
 
         return {
             'successorScore': self.getScore(successor)
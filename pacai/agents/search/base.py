@@ -19,6 +19,8 @@ class SearchAgent(BaseAgent):
 
     As a default, this agent runs `pacai.student.search.depthFirstSearch` on a
     `pacai.core.search.position.PositionSearchProblem` to find location (1, 1).
+    The reference searches in `pacai.core.search.engine` can be used through `fn`,
+    e.g. `fn = 'pacai.core.search.engine.astar'`.
     """
 
     def __init__(self, index,
@@ -14,6 +14,7 @@ import sys
 from pacai.agents import keyboard
 from pacai.agents.capture.dummy import DummyAgent
 from pacai.bin.arguments import getParser
+from pacai.core import distanceCalculator
 from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
@@ -81,15 +82,15 @@ class CaptureGameState(AbstractGameState):
         self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
         self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
 
-        for x in range(self._food.getWidth()):
-            for y in range(self._food.getHeight()):
-                if (not self._food[x][y]):
-                    continue
+        for (x, y) in self._food.iterPositions():
+            if (self.isOnRedSide((x, y))):
+                self._redFood[x][y] = True
+            else:
+                self._blueFood[x][y] = True
 
-                if (self.isOnRedSide((x, y))):
-                    self._redFood[x][y] = True
-                else:
-                    self._blueFood[x][y] = True
+        # Kept up to date by eatFood(), so counting food never scans the grids.
+        self._numRedFood = self._redFood.count()
+        self._numBlueFood = self._blueFood.count()
 
     # Override
     def generateSuccessor(self, agentIndex, action):
@@ -128,12 +129,17 @@ class CaptureGameState(AbstractGameState):
             self._redFood = self._redFood.copy()
             self._blueFood = self._blueFood.copy()
 
-        super().eatFood(x, y)
+        if (not super().eatFood(x, y)):
+            return False
 
         if (self.isOnRedSide((x, y))):
             self._redFood[x][y] = False
+            self._numRedFood -= 1
         else:
             self._blueFood[x][y] = False
+            self._numBlueFood -= 1
+
+        return True
 
     def getBlueCapsules(self):
         """
@@ -161,6 +167,20 @@ class CaptureGameState(AbstractGameState):
 
         return self._blueTeam
 
+    def getNumBlueFood(self):
+        """
+        Get the amount of food left on the blue team's side.
+        """
+
+        return self._numBlueFood
+
+    def getNumRedFood(self):
+        """
+        Get the amount of food left on the red team's side.
+        """
+
+        return self._numRedFood
+
     def getRedCapsules(self):
         """
         Get a list of remaining capsules on the red side.
@@ -224,21 +244,32 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, legalActions = None):
         """
         Apply the action to the context state (self).
         """
 
         # Find appropriate rules for the agent.
-        AgentRules.applyAction(self, action, agentIndex)
+        AgentRules.applyAction(self, action, agentIndex, legalActions)
         AgentRules.checkDeath(self, agentIndex)
-        AgentRules.decrementTimer(self.getAgentState(agentIndex))
+        AgentRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Book keeping.
         self._lastAgentMoved = agentIndex
         self._timeleft -= 1
 
-        self._hash = None
+    # Override
+    def _restoreUndoState(self, token):
+        (parentToken, self._timeleft, self._redFood, self._blueFood,
+                self._numRedFood, self._numBlueFood, self._redCapsules, self._blueCapsules) = token
+
+        super()._restoreUndoState(parentToken)
+
+    # Override
+    def _saveUndoState(self):
+        return (super()._saveUndoState(), self._timeleft, self._redFood, self._blueFood,
+                self._numRedFood, self._numBlueFood, self._redCapsules, self._blueCapsules)
 
 class CaptureRules:
     """
@@ -255,8 +286,8 @@ class CaptureRules:
         game.state = initState
         game.length = length
 
-        self._totalBlueFood = initState.getBlueFood().count()
-        self._totalRedFood = initState.getRedFood().count()
+        self._totalBlueFood = initState.getNumBlueFood()
+        self._totalRedFood = initState.getNumRedFood()
 
         return game
 
@@ -279,10 +310,10 @@ class CaptureRules:
         redWin = False
         blueWin = False
 
-        if (state.getRedFood().count() <= MIN_FOOD):
+        if (state.getNumRedFood() <= MIN_FOOD):
             logging.info("The Blue team ate all but %d of the opponents' dots." % MIN_FOOD)
             blueWin = True
-        elif (state.getBlueFood().count() <= MIN_FOOD):
+        elif (state.getNumBlueFood() <= MIN_FOOD):
             logging.info("The Red team ate all but %d of the opponents' dots." % MIN_FOOD)
             redWin = True
         else:
@@ -342,20 +373,23 @@ class AgentRules:
         """
 
         agentState = state.getAgentState(agentIndex)
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return list(state.getInitialLayout().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action, agentIndex):
+    def applyAction(state, action, agentIndex, legalActions = None):
         """
         Edits the state to reflect the results of the action.
         """
 
-        legal = AgentRules.getLegalActions(state, agentIndex)
+        legal = legalActions
+        if (legal is None):
+            legal = AgentRules.getLegalActions(state, agentIndex)
+
         if (action not in legal):
             raise ValueError('Illegal action: ' + str(action))
 
-        agentState = state.getAgentState(agentIndex)
+        agentState = state.getMutableAgentState(agentIndex)
 
         # Update position.
         vector = Actions.directionToVector(action, AgentRules.AGENT_SPEED)
@@ -392,8 +426,8 @@ class AgentRules:
             else:
                 state.addScore(-FOOD_POINTS)
 
-            if ((isRed and state.getBlueFood().count() <= MIN_FOOD)
-                    or (not isRed and state.getRedFood().count() <= MIN_FOOD)):
+            if ((isRed and state.getNumBlueFood() <= MIN_FOOD)
+                    or (not isRed and state.getNumRedFood() <= MIN_FOOD)):
                 state.endGame(True)
 
             return
@@ -414,7 +448,7 @@ class AgentRules:
                 otherTeam = state.getRedTeamIndices()
 
             for agentIndex in otherTeam:
-                state.getAgentState(agentIndex).setScaredTimer(SCARED_TIME)
+                state.getMutableAgentState(agentIndex).setScaredTimer(SCARED_TIME)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -455,9 +489,10 @@ class AgentRules:
             # Otherwise, we are being eatten.
             if (agentState.isBraveGhost() or otherAgentState.isScaredGhost()):
                 state.addScore(teamPointModifier * KILL_POINTS)
-                otherAgentState.respawn()
+                state.getMutableAgentState(otherAgentIndex).respawn()
             else:
                 state.addScore(teamPointModifier * -KILL_POINTS)
+                agentState = state.getMutableAgentState(agentIndex)
                 agentState.respawn()
 
 #############################
@@ -519,6 +554,11 @@ def readCommand(argv):
             help = 'comma separated arguments to be passed to blue team (e.g. \'opt1=val1,opt2\') '
                 + '(default: %(default)s)')
 
+    parser.add_argument('--distance-cache', dest = 'distanceCache',
+            action = 'store', type = str, default = None,
+            help = 'keep precomputed maze distances in the specified directory '
+                + '(see pacai.bin.distances) (default: %(default)s)')
+
     parser.add_argument('--keys0', dest = 'keys0',
             action = 'store_true', default = False,
             help = 'make agent 0 (first red player) a keyboard agent (default: %(default)s)')
@@ -559,6 +599,9 @@ def readCommand(argv):
     elif options.debug:
         updateLoggingLevel(logging.DEBUG)
 
+    if (options.distanceCache is not None):
+        distanceCalculator.setDiskCacheDir(options.distanceCache)
+
     viewOptions = {
         'gifFPS': options.gifFPS,
         'gifPath': options.gif,
@@ -0,0 +1,82 @@
+"""
+Pre-compute the maze distances for layouts and store them in the on-disk distance cache
+(see `pacai.core.distanceCalculator.setDiskCacheDir`).
+Any later process that uses the same cache directory
+(e.g. by setting the PACAI_DISTANCE_CACHE environment variable)
+will memory-map these distances instead of computing them.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+
+from pacai.core import distanceCalculator
+from pacai.core.layout import DEFAULT_LAYOUT_DIR
+from pacai.core.layout import getLayout
+from pacai.util.logs import initLogging
+
+def readCommand(argv):
+    """
+    Processes the command used to run the distance cache warmer from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program will compute the maze distances for layouts and save them to a cache directory.
+        By default, every layout in pacai/core/layouts is used.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.distances --cache-dir /tmp/pacai-distances
+            - Cache the distances for all the standard layouts.
+        (2) python -m pacai.bin.distances --cache-dir /tmp/pacai-distances defaultCapture
+            - Cache the distances for only the defaultCapture layout.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('layouts', metavar = 'LAYOUT',
+            action = 'store', type = str, nargs = '*',
+            help = 'the layouts to cache (default: all the layouts in %s)' % (DEFAULT_LAYOUT_DIR))
+
+    parser.add_argument('--cache-dir', dest = 'cacheDir',
+            action = 'store', type = str,
+            default = os.environ.get(distanceCalculator.DISK_CACHE_ENV_VAR),
+            help = 'the directory to store distances in (default: $%s)'
+                % (distanceCalculator.DISK_CACHE_ENV_VAR))
+
+    options = parser.parse_args(argv)
+
+    if (options.cacheDir is None):
+        raise ValueError('A cache directory must be supplied with --cache-dir or $%s.'
+                % (distanceCalculator.DISK_CACHE_ENV_VAR))
+
+    if (len(options.layouts) == 0):
+        options.layouts = sorted([name for name in os.listdir(DEFAULT_LAYOUT_DIR)
+                if name.endswith('.lay')])
+
+    return options
+
+def main(argv):
+    """
+    Entry point for the distance cache warmer.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    initLogging()
+
+    options = readCommand(argv)
+    distanceCalculator.setDiskCacheDir(options.cacheDir)
+
+    for name in options.layouts:
+        layout = getLayout(name)
+
+        if (distanceCalculator.warmDiskCache(layout)):
+            logging.info('Cached distances for %s.' % (name))
+        else:
+            logging.info('Distances for %s were already cached.' % (name))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
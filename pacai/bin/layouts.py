@@ -0,0 +1,71 @@
+"""
+Compile text layouts into the binary layout format (see `pacai.core.layout.compileLayout`).
+`pacai.core.layout.getLayout` will load an up-to-date compiled layout instead of parsing the text.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+
+from pacai.core import layout
+from pacai.util.logs import initLogging
+
+def readCommand(argv):
+    """
+    Processes the command used to run the layout compiler from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program will compile layouts into a binary format that is faster to load.
+        Each compiled layout is written next to its text layout.
+        By default, every layout in pacai/core/layouts is compiled.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.layouts
+            - Compile all the standard layouts.
+        (2) python -m pacai.bin.layouts defaultCapture tinyMaze
+            - Compile only the defaultCapture and tinyMaze layouts.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('layouts', metavar = 'LAYOUT',
+            action = 'store', type = str, nargs = '*',
+            help = 'the layouts to compile (default: all the layouts in the layout directory)')
+
+    parser.add_argument('--layout-dir', dest = 'layoutDir',
+            action = 'store', type = str, default = layout.DEFAULT_LAYOUT_DIR,
+            help = 'the directory to find layouts in (default: %(default)s)')
+
+    options = parser.parse_args(argv)
+
+    if (len(options.layouts) == 0):
+        options.layouts = sorted([name for name in os.listdir(options.layoutDir)
+                if name.endswith(layout.LAYOUT_EXTENSION)])
+
+    return options
+
+def main(argv):
+    """
+    Entry point for the layout compiler.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    initLogging()
+
+    options = readCommand(argv)
+
+    for name in options.layouts:
+        if (not name.endswith(layout.LAYOUT_EXTENSION)):
+            name += layout.LAYOUT_EXTENSION
+
+        path = layout.compileLayout(os.path.join(options.layoutDir, name))
+        if (path is not None):
+            logging.info('Compiled %s to %s.' % (name, path))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -18,7 +18,6 @@ from pacai.agents.ghost.random import RandomGhost
 from pacai.agents.greedy import GreedyAgent
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
-from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
@@ -118,23 +117,24 @@ class PacmanGameState(AbstractGameState):
 
         return self._agentStates[PACMAN_AGENT_INDEX]
 
-    def _applySuccessorAction(self, agentIndex, action):
+    # Override
+    def _applySuccessorAction(self, agentIndex, action, legalActions = None):
         """
         Apply the action to the context state (self).
         """
 
         # Let the agent's logic deal with its action's effects on the board.
         if (agentIndex == PACMAN_AGENT_INDEX):
-            PacmanRules.applyAction(self, action)
+            PacmanRules.applyAction(self, action, legalActions)
         else:
-            GhostRules.applyAction(self, action, agentIndex)
+            GhostRules.applyAction(self, action, agentIndex, legalActions)
 
         # Time passes.
         if (agentIndex == PACMAN_AGENT_INDEX):
             # Penalty for waiting around.
             self.addScore(-TIME_PENALTY)
         else:
-            GhostRules.decrementTimer(self.getAgentState(agentIndex))
+            GhostRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Resolve multi-agent effects.
         GhostRules.checkDeath(self, agentIndex)
@@ -142,8 +142,6 @@ class PacmanGameState(AbstractGameState):
         # Book keeping.
         self._lastAgentMoved = agentIndex
 
-        self._hash = None
-
 class ClassicGameRules(object):
     """
     These game rules manage the control flow of a game, deciding when
@@ -217,20 +215,23 @@ class PacmanRules:
         """
 
         agentState = state.getPacmanState()
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return list(state.getInitialLayout().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action):
+    def applyAction(state, action, legalActions = None):
         """
         Edits the state to reflect the results of the action.
         """
 
-        legal = PacmanRules.getLegalActions(state)
+        legal = legalActions
+        if (legal is None):
+            legal = PacmanRules.getLegalActions(state)
+
         if (action not in legal):
             raise ValueError('Illegal pacman action: ' + str(action))
 
-        pacmanState = state.getPacmanState()
+        pacmanState = state.getMutableAgentState(PACMAN_AGENT_INDEX)
 
         # Update position.
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -260,8 +261,8 @@ class PacmanRules:
             state.eatCapsule(x, y)
 
             # Reset all ghosts' scared timers.
-            for ghostState in state.getGhostStates():
-                ghostState.setScaredTimer(SCARED_TIME)
+            for index in state.getGhostIndexes():
+                state.getMutableAgentState(index).setScaredTimer(SCARED_TIME)
 
 class GhostRules:
     """
@@ -278,25 +279,19 @@ class GhostRules:
         """
 
         agentState = state.getGhostState(ghostIndex)
-        possibleActions = Actions.getPossibleActions(agentState.getPosition(),
-                agentState.getDirection(), state.getWalls())
-        reverse = Actions.reverseDirection(agentState.getDirection())
-
-        if (Directions.STOP in possibleActions):
-            possibleActions.remove(Directions.STOP)
-
-        if (reverse in possibleActions and len(possibleActions) > 1):
-            possibleActions.remove(reverse)
-
-        return possibleActions
+        return list(state.getInitialLayout().getGhostActions(agentState.getPosition(),
+                agentState.getDirection()))
 
     @staticmethod
-    def applyAction(state, action, ghostIndex):
-        legal = GhostRules.getLegalActions(state, ghostIndex)
+    def applyAction(state, action, ghostIndex, legalActions = None):
+        legal = legalActions
+        if (legal is None):
+            legal = GhostRules.getLegalActions(state, ghostIndex)
+
         if (action not in legal):
             raise ValueError('Illegal ghost action: ' + str(action))
 
-        ghostState = state.getGhostState(ghostIndex)
+        ghostState = state.getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if (ghostState.isScared()):
             speed /= 2.0
@@ -341,7 +336,7 @@ class GhostRules:
         if (ghostState.isScared()):
             # Pacman ate a ghost.
             state.addScore(GHOST_POINTS)
-            ghostState.respawn()
+            state.getMutableAgentState(agentIndex).respawn()
         elif (not state.isOver()):
             # A ghost ate pacman.
             state.addScore(LOSE_POINTS)
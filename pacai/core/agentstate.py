@@ -9,8 +9,14 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Every successor state copies all of its agent states,
+    so this class uses slots and `AgentState.copy` skips the constructor.
     """
 
+    __slots__ = ('_startPosition', '_startDirection', '_startIsPacman',
+            '_position', '_direction', '_isPacman', '_scaredTimer', '_zobrist')
+
     def __init__(self, position, direction, isPacman):
         # Save the starting information for later use.
         self._startPosition = position
@@ -23,18 +29,26 @@ class AgentState:
         self._isPacman = isPacman
         self._scaredTimer = 0
 
+        # A Zobrist key over the fields used for equality, kept up-to-date by every mutator.
+        self._zobrist = self._computeZobrist()
+
     def copy(self):
-        state = AgentState(self._startPosition, self._startDirection, self._startIsPacman)
+        state = AgentState.__new__(AgentState)
+
+        state._startPosition = self._startPosition
+        state._startDirection = self._startDirection
+        state._startIsPacman = self._startIsPacman
 
-        state._isPacman = self._isPacman
         state._position = self._position
         state._direction = self._direction
+        state._isPacman = self._isPacman
         state._scaredTimer = self._scaredTimer
+        state._zobrist = self._zobrist
 
         return state
 
     def decrementScaredTimer(self):
-        self._scaredTimer = max(0, self._scaredTimer - 1)
+        self.setScaredTimer(max(0, self._scaredTimer - 1))
 
     def getDirection(self):
         return self._direction
@@ -68,9 +82,13 @@ class AgentState:
         return (self.isGhost() and self.isScared())
 
     def setIsPacman(self, isPacman):
+        self._zobrist ^= (util.zobristKey('isPacman', self._isPacman)
+                ^ util.zobristKey('isPacman', isPacman))
         self._isPacman = isPacman
 
     def setScaredTimer(self, timer):
+        self._zobrist ^= (util.zobristKey('scaredTimer', self._scaredTimer)
+                ^ util.zobristKey('scaredTimer', timer))
         self._scaredTimer = timer
 
     def snapToNearestPoint(self):
@@ -78,17 +96,17 @@ class AgentState:
         Move the agent to the nearest point to its current location.
         """
 
-        self._position = util.nearestPoint(self._position)
+        self._setPosition(util.nearestPoint(self._position))
 
     def respawn(self):
         """
         This agent was killed, respawn it at the start as a pacman.
         """
 
-        self._position = self._startPosition
-        self._direction = self._startDirection
-        self._isPacman = self._startIsPacman
-        self._scaredTimer = 0
+        self._setPosition(self._startPosition)
+        self._setDirection(self._startDirection)
+        self.setIsPacman(self._startIsPacman)
+        self.setScaredTimer(0)
 
     def updatePosition(self, vector):
         """
@@ -98,24 +116,44 @@ class AgentState:
         x, y = self._position
         dx, dy = vector
 
-        self._position = (x + dx, y + dy)
+        self._setPosition((x + dx, y + dy))
 
         direction = Actions.vectorToDirection(vector)
         if (direction != Directions.STOP):
             # If this is a zero vector, face the same direction as before.
-            self._direction = direction
+            self._setDirection(direction)
+
+    def _computeZobrist(self):
+        return (util.zobristKey('position', self._position)
+                ^ util.zobristKey('direction', self._direction)
+                ^ util.zobristKey('isPacman', self._isPacman)
+                ^ util.zobristKey('scaredTimer', self._scaredTimer))
+
+    def _setDirection(self, direction):
+        self._zobrist ^= (util.zobristKey('direction', self._direction)
+                ^ util.zobristKey('direction', direction))
+        self._direction = direction
+
+    def _setPosition(self, position):
+        self._zobrist ^= (util.zobristKey('position', self._position)
+                ^ util.zobristKey('position', position))
+        self._position = position
 
     def __eq__(self, other):
         if (other is None):
             return False
 
+        # Equal states always have equal keys, so most unequal states are rejected right away.
+        if (self._zobrist != other._zobrist):
+            return False
+
         return (self._position == other._position
                 and self._direction == other._direction
                 and self._isPacman == other._isPacman
                 and self._scaredTimer == other._scaredTimer)
 
     def __hash__(self):
-        return util.buildHash(self._position, self._direction, self._isPacman, self._scaredTimer)
+        return self._zobrist
 
     def __str__(self):
         typeString = 'Ghost'
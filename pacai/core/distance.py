@@ -1,6 +1,11 @@
+from pacai.core.search import engine
 from pacai.core.search.position import PositionSearchProblem
 from pacai.student import search
 
+# Distances found by `cachedMaze`:
+# {walls fingerprint: `pacai.core.distanceCalculator.LazyDistanceMatrix`}.
+_mazeCache = {}
+
 def manhattan(position1, position2):
     """
     Manhattan distance between two position tuples (x, y).
@@ -15,12 +20,15 @@ def euclidean(position1, position2):
 
     return ((position1[0] - position2[0]) ** 2 + (position1[1] - position2[1]) ** 2) ** 0.5
 
-def maze(position1, position2, gameState):
+def maze(position1, position2, gameState, bidirectional = False):
     """
     Returns the maze distance between any two positions,
     using the search functions you have already built.
+    If bidirectional is True, then `pacai.core.search.engine.bidirectionalSearch` is used instead,
+    which searches from both positions and expands far fewer positions on open layouts.
 
-    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted.
+    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted
+    (unless bidirectional is True).
 
     Example usage: `distance.maze((2, 4), (5, 6), gameState)`.
     """
@@ -38,4 +46,50 @@ def maze(position1, position2, gameState):
 
     prob = PositionSearchProblem(gameState, start = position1, goal = position2)
 
+    if (bidirectional):
+        return len(engine.bidirectionalSearch(prob))
+
     return len(search.breadthFirstSearch(prob))
+
+def cachedMaze(position1, position2, gameState):
+    """
+    Returns the same maze distance as `maze`, but remembers the answers.
+    The first query from a source runs a single BFS that finds the distance to every position,
+    so later queries from that source (in any game with the same walls) are O(1).
+    The distances are kept in a `pacai.core.distanceCalculator.LazyDistanceMatrix`,
+    which holds the rows of the most recently used sources.
+    Raises a ValueError if there is no path between the positions.
+
+    Call `clearMazeCache` to free the memory used.
+    """
+
+    # The distance calculator is built on top of this module.
+    from pacai.core import distanceCalculator
+
+    walls = gameState.getWalls()
+
+    if (walls[position1[0]][position1[1]]):
+        raise ValueError('Position1 is a wall: ' + str(position1))
+
+    if (walls[position2[0]][position2[1]]):
+        raise ValueError('Position2 is a wall: ' + str(position2))
+
+    key = walls.getFingerprint()
+
+    distances = _mazeCache.get(key)
+    if (distances is None):
+        distances = distanceCalculator.LazyDistanceMatrix(gameState.getInitialLayout())
+        _mazeCache[key] = distances
+
+    distance = distances.getDistance(position1, position2)
+    if (distance == distanceCalculator.UNREACHABLE_DISTANCE):
+        raise ValueError('No path between positions: ' + str((position1, position2)))
+
+    return distance
+
+def clearMazeCache():
+    """
+    Forget all the distances remembered by `cachedMaze`.
+    """
+
+    _mazeCache.clear()
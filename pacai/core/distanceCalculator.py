@@ -1,10 +1,30 @@
+import array
+import collections
+import logging
+import mmap
+import os
+import struct
 import sys
+import time
 
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
 
 DEFAULT_DISTANCE = 10000
 
+# Compute all-pairs distances up front (shared by every distancer in the process).
+MODE_ALL_PAIRS = 'allPairs'
+# Compute the distances from a source only when that source is first queried.
+MODE_LAZY = 'lazy'
+# Contract corridors and only store the distances between junctions (see pacai.core.junctionGraph).
+MODE_JUNCTIONS = 'junctions'
+# Compute all-pairs distances a slice at a time (see Distancer.computeMazeDistances).
+MODE_INCREMENTAL = 'incremental'
+
+MODES = [MODE_ALL_PAIRS, MODE_LAZY, MODE_JUNCTIONS, MODE_INCREMENTAL]
+
+# The number of rows (sources) that a lazy distancer will keep.
+DEFAULT_MAX_LAZY_ROWS = 256
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -14,15 +34,61 @@ class Distancer(object):
     distancer = Distancer(gameState.getInitialLayout())
     distancer.getDistance((1, 1), (10, 10))
     ```
+
+    By default, the distances between all pairs of positions are computed up front.
+    For very large mazes, MODE_LAZY can be used instead to only compute the distances
+    from positions that are actually queried
+    (keeping the maxLazyRows most recently used sources).
+    MODE_JUNCTIONS keeps exact distances in much less memory
+    by only storing the distances between corridor junctions.
+    MODE_INCREMENTAL does not compute anything up front,
+    instead distances are filled in by calls to `Distancer.computeMazeDistances`.
+    Until then, sources that have not been computed get the manhattan distance.
     """
 
-    def __init__(self, layout):
+    def __init__(self, layout, mode = MODE_ALL_PAIRS, maxLazyRows = DEFAULT_MAX_LAZY_ROWS):
+        if (mode not in MODES):
+            raise ValueError("Unknown distancer mode: '%s'." % (mode))
+
         self._distances = None
-        self.dc = DistanceCalculator(layout, self)
+        self.dc = DistanceCalculator(layout, self, mode, maxLazyRows)
+
+    def computeMazeDistances(self, timeLimit):
+        """
+        Spend at most (about) timeLimit seconds computing distances.
+        This is only useful in MODE_INCREMENTAL, other modes compute everything at once.
+        Returns True if all the distances are ready.
+        """
+
+        self.dc.run()
+
+        if (isinstance(self._distances, IncrementalDistanceMatrix)):
+            return self._distances.computeRows(timeLimit)
+
+        return True
 
     def getMazeDistances(self):
+        """
+        Make all the maze distances ready.
+        In MODE_INCREMENTAL, this finishes computing the rows that are left
+        (keeping the ones already computed).
+        """
+
         self.dc.run()
 
+        if (isinstance(self._distances, IncrementalDistanceMatrix)):
+            self._distances.computeRows(float('inf'))
+
+    def getProgress(self):
+        """
+        Get the fraction (in [0, 1]) of the maze distances that are exact.
+        """
+
+        if (self._distances is None):
+            return 0.0
+
+        return self.getStats().get('progress', 1.0)
+
     def getDistance(self, pos1, pos2):
         """
         The only function you will need after you create the object.
@@ -47,16 +113,97 @@ class Distancer(object):
 
         return bestDistance
 
+    def getDistanceById(self, cellId1, cellId2):
+        """
+        Get the maze distance between two cells by their ids (see `pacai.core.layout.Layout.cellId`).
+        This skips all the checks getDistance() does on positions.
+        """
+
+        if (self._distances is None):
+            cells = self.dc.layout.getCells()
+            return manhattan(cells[cellId1], cells[cellId2])
+
+        return self._distances.getDistanceById(cellId1, cellId2)
+
+    def getDistances(self, source, targets):
+        """
+        Get the distances from the source to each of the targets (in the same order).
+        This gives the same answers as calling `Distancer.getDistance` for each target,
+        but positions on the grid are answered by indexing directly into the source's row
+        (when that row is already held).
+        """
+
+        if (self._distances is None):
+            return [manhattan(source, target) for target in targets]
+
+        sourceId = self._distances.getCellId(source)
+        if (sourceId is None):
+            return [self.getDistance(source, target) for target in targets]
+
+        # Only index into a row that is already held,
+        # building a whole row would cost more than looking up a few targets.
+        row = None
+        if (self._distances.hasRow(sourceId)):
+            row = self._distances.getRow(sourceId)
+
+        cellIds = self._distances.getCellIds()
+
+        distances = []
+        for target in targets:
+            targetId = cellIds.get(target)
+            if (targetId is None):
+                # Between grid points (or not an open cell).
+                distances.append(self.getDistance(source, target))
+            elif (row is None):
+                distances.append(self._distances.getDistanceById(sourceId, targetId))
+            else:
+                distances.append(row[targetId])
+
+        return distances
+
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
+        try:
+            return self._distances.getDistance(pos1, pos2)
+        except KeyError:
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
 
-        raise Exception("Position not in grid: " + str(key))
+    def getStats(self):
+        """
+        Get statistics about the underlying distances (e.g. how many rows have been computed).
+        """
+
+        if (self._distances is None):
+            return {}
+
+        return self._distances.getStats()
+
+    def getPairwiseDistances(self, sources, targets):
+        """
+        Get the distances from every source to every target.
+        Returns a list (one per source) of lists (one per target).
+        """
+
+        return [self.getDistances(source, targets) for source in sources]
 
     def isReadyForMazeDistance(self):
         return (self._distances is not None)
 
+    def nearest(self, source, targets):
+        """
+        Find the target closest to the source.
+        Returns (target, distance), or (None, None) if there are no targets.
+        Ties go to the target that comes first.
+        """
+
+        targets = list(targets)
+        if (len(targets) == 0):
+            return None, None
+
+        distances = self.getDistances(source, targets)
+        bestIndex = min(range(len(distances)), key = distances.__getitem__)
+
+        return targets[bestIndex], distances[bestIndex]
+
 def isInt(pos):
     x, y = pos
     return x == int(x) and y == int(y)
@@ -78,73 +225,504 @@ def getGrids1D(x):
 # MACHINERY FOR COMPUTING MAZE DISTANCES #
 ##########################################
 
-distanceMap = {}
+# The largest distance a DistanceMatrix can hold, also used for unreachable pairs of cells.
+UNREACHABLE_DISTANCE = 0xFFFF
+
+# The number of layouts that the process-wide cache will hold distances for.
+DEFAULT_CACHE_SIZE = 16
+
+# Setting this environment variable to a directory turns on the on-disk distance cache.
+DISK_CACHE_ENV_VAR = 'PACAI_DISTANCE_CACHE'
+DISK_CACHE_EXTENSION = '.dist'
+DISK_CACHE_MAGIC = b'PACDIST'
+DISK_CACHE_VERSION = 1
+
+# The header of an on-disk distance matrix:
+# magic, version, byte order (b'l' or b'b'), padding, width, height, number of cells.
+# The header is followed by the (x, y) of each cell and then the full matrix,
+# all as unsigned 16-bit integers in the byte order of the machine that wrote the file.
+_DISK_HEADER = struct.Struct('<7sBcxHHI')
+
+# Distance matrices shared by every agent and game in this process,
+# keyed by the fingerprint of the layout's walls and kept in least-recently-used order.
+_matrixCache = collections.OrderedDict()
+_maxCacheSize = DEFAULT_CACHE_SIZE
+_cacheStats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0,
+    'diskHits': 0,
+    'diskWrites': 0,
+}
+
+_diskCacheDir = os.environ.get(DISK_CACHE_ENV_VAR)
+
+# Incremental matrices that are still being filled in, keyed by the fingerprint of the walls.
+# Every distancer on the same walls continues the same matrix,
+# which moves to _matrixCache once it is complete.
+_incrementalMatrices = collections.OrderedDict()
 
 class DistanceCalculator:
-    def __init__(self, layout, distancer):
+    def __init__(self, layout, distancer, mode = MODE_ALL_PAIRS,
+            maxLazyRows = DEFAULT_MAX_LAZY_ROWS):
         self.layout = layout
         self.distancer = distancer
-        self.cache = {}
+        self.mode = mode
+        self.maxLazyRows = maxLazyRows
 
     def run(self):
-        if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+        # Keep the distances (and any work done on them) once they are built.
+        if (self.distancer._distances is not None):
+            return
+
+        if (self.mode == MODE_LAZY):
+            self.distancer._distances = LazyDistanceMatrix(self.layout, self.maxLazyRows)
+        elif (self.mode == MODE_JUNCTIONS):
+            # The junction graph is built on top of this module.
+            from pacai.core.junctionGraph import JunctionGraph
+            self.distancer._distances = JunctionGraph(self.layout)
+        elif (self.mode == MODE_INCREMENTAL):
+            self.distancer._distances = getIncrementalDistanceMatrix(self.layout)
+        else:
+            self.distancer._distances = getDistanceMatrix(self.layout)
+
+class CellIndex(object):
+    """
+    The open cells of a maze, each with an integer id.
+    The distance engines below all index their distances by these ids.
+    """
 
-        self.distancer._distances = self.cache[self.layout.walls]
+    def __init__(self, cells, cellIds = None):
+        if (cellIds is None):
+            cellIds = {cell: cellId for (cellId, cell) in enumerate(cells)}
 
-def computeDistances(layout):
+        self._cells = cells
+        self._cellIds = cellIds
+        self._numCells = len(cells)
+
+    def getCellId(self, position):
+        """
+        Get the id for a position, or None if the position is not an open cell.
+        """
+
+        return self._cellIds.get(position)
+
+    def getCellIds(self):
+        """
+        Get a dict of every open cell to its id.
+        The caller should not modify the dict.
+        """
+
+        return self._cellIds
+
+    def getCells(self):
+        """
+        Get all the open cells, indexed by their id.
+        """
+
+        return self._cells
+
+    def getNumCells(self):
+        return self._numCells
+
+    def __contains__(self, position):
+        return position in self._cellIds
+
+class DistanceMatrix(CellIndex):
     """
-    Runs UCS to all other positions from each position.
+    The maze distances between every pair of open cells in a layout.
+
+    Each open cell is given an integer id (in the order of `walls.asList(False)`),
+    and all the distances are kept in one dense array of unsigned 16-bit integers,
+    where the distance from cell i to cell j is at index (i * numCells + j).
+    Pairs of cells that cannot reach each other have a distance of UNREACHABLE_DISTANCE.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    def __init__(self, cells, distances, cellIds = None):
+        super().__init__(cells, cellIds)
+
+        self._distances = distances
+
+        # Rows are handed out as slices of a view, so they are never copied.
+        self._view = memoryview(distances)
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the distance between two open cells.
+        Raises a KeyError if either position is not an open cell.
+        """
+
+        return self._distances[self._cellIds[pos1] * self._numCells + self._cellIds[pos2]]
+
+    def getDistanceById(self, cellId1, cellId2):
+        return self._distances[cellId1 * self._numCells + cellId2]
+
+    def getRow(self, cellId):
+        """
+        Get the distances from the given cell id to every other cell id.
+        """
+
+        start = cellId * self._numCells
+        return self._view[start:(start + self._numCells)]
+
+    def getStats(self):
+        return {
+            'numCells': self._numCells,
+        }
+
+    def hasRow(self, cellId):
+        """
+        Every row is held.
+        """
+
+        return True
+
+class LazyDistanceMatrix(CellIndex):
+    """
+    Maze distances that are computed one row (source) at a time,
+    the first time a distance from (or to) that source is asked for.
+    Only the maxRows most recently used rows are kept.
+
+    Since distances are symmetric, a query can be answered by the row of either position.
+    """
+
+    def __init__(self, layout, maxRows = DEFAULT_MAX_LAZY_ROWS):
+        if (maxRows < 1):
+            raise ValueError("A lazy distance matrix must be able to hold at least one row.")
+
+        super().__init__(layout.getCells(), layout.getCellIds())
+        self._neighbors = _buildNeighbors(layout)
+
+        self._maxRows = maxRows
+        self._rows = collections.OrderedDict()
+
+        self._rowsComputed = 0
+        self._rowsEvicted = 0
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+    def getDistance(self, pos1, pos2):
+        """
+        Get the distance between two open cells.
+        Raises a KeyError if either position is not an open cell.
+        """
+
+        source = self._cellIds[pos1]
+        target = self._cellIds[pos2]
+
+        return self.getDistanceById(source, target)
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+    def getDistanceById(self, source, target):
+        # Prefer a row we already have.
+        if (source not in self._rows and target in self._rows):
+            source, target = target, source
+
+        return self.getRow(source)[target]
+
+    def getRow(self, cellId):
+        """
+        Get the distances from the given cell id to every other cell id,
+        computing them if they are not already held.
+        """
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+        row = self._rows.get(cellId)
+        if (row is not None):
+            self._rows.move_to_end(cellId)
+            return row
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
-                continue
+        row = array.array('H', _breadthFirstDistances(cellId, self._neighbors))
+        self._rowsComputed += 1
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+        self._rows[cellId] = row
+        while (len(self._rows) > self._maxRows):
+            self._rows.popitem(last = False)
+            self._rowsEvicted += 1
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+        return row
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+    def getStats(self):
+        return {
+            'numCells': self._numCells,
+            'rowsCached': len(self._rows),
+            'rowsComputed': self._rowsComputed,
+            'rowsEvicted': self._rowsEvicted,
+        }
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+    def hasRow(self, cellId):
+        """
+        Check if the row for the given cell id is held (so `LazyDistanceMatrix.getRow` is cheap).
+        """
+
+        return cellId in self._rows
+
+class IncrementalDistanceMatrix(CellIndex):
+    """
+    All-pairs maze distances that are filled in one row (source) at a time
+    by calls to `IncrementalDistanceMatrix.computeRows`.
+    Queries are answered from a computed row of either position,
+    and with the manhattan distance if neither row has been computed yet.
+
+    Once every row is computed, the full matrix is put in the process-wide cache
+    (just like `getDistanceMatrix`).
+    If the cache already has the matrix, then it is used right away.
+    Use `getIncrementalDistanceMatrix` to share the rows computed so far
+    with every other distancer on the same walls.
+    """
+
+    def __init__(self, layout):
+        super().__init__(layout.getCells(), layout.getCellIds())
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+        self._walls = layout.walls
+        self._key = layout.walls.getFingerprint()
 
-            for other in adjacent:
-                if other not in dist:
-                    continue
+        self._matrix = _lookupDistanceMatrix(self._key, self._walls)
+        if (self._matrix is not None):
+            return
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+        self._neighbors = _buildNeighbors(layout)
+
+        self._rows = [None] * self._numCells
+        self._rowsComputed = 0
+
+        # An empty maze is already done.
+        self.computeRows(0)
+
+    def computeRows(self, timeLimit):
+        """
+        Compute rows until timeLimit seconds have passed (the row in progress is always finished).
+        Returns True if all the rows have been computed.
+        """
+
+        if (self._matrix is not None):
+            return True
+
+        endTime = time.time() + timeLimit
+        while (self._rowsComputed < self._numCells and time.time() < endTime):
+            source = self._rowsComputed
+            self._rows[source] = array.array('H', _breadthFirstDistances(source, self._neighbors))
+            self._rowsComputed += 1
+
+        if (self._rowsComputed < self._numCells):
+            return False
+
+        distances = array.array('H')
+        for row in self._rows:
+            distances.extend(row)
+
+        self._matrix = DistanceMatrix(self._cells, distances, self._cellIds)
+        self._rows = None
+
+        _storeDistanceMatrix(self._key, self._walls, self._matrix)
+        if (_incrementalMatrices.get(self._key) is self):
+            del _incrementalMatrices[self._key]
+
+        return True
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the distance between two open cells.
+        Raises a KeyError if either position is not an open cell.
+        """
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+        if (self._matrix is not None):
+            return self._matrix.getDistance(pos1, pos2)
+
+        return self.getDistanceById(self._cellIds[pos1], self._cellIds[pos2])
+
+    def getDistanceById(self, source, target):
+        if (self._matrix is not None):
+            return self._matrix.getDistanceById(source, target)
+
+        if (self._rows[source] is not None):
+            return self._rows[source][target]
+
+        if (self._rows[target] is not None):
+            return self._rows[target][source]
+
+        return manhattan(self._cells[source], self._cells[target])
+
+    def getProgress(self):
+        """
+        Get the fraction (in [0, 1]) of rows that have been computed.
+        """
+
+        if (self._matrix is not None):
+            return 1.0
+
+        return self._rowsComputed / self._numCells
+
+    def getRow(self, cellId):
+        """
+        Get the distances from the given cell id to every other cell id.
+        A row that has not been computed yet is filled with manhattan distances
+        (except for targets whose own row has been computed).
+        """
+
+        if (self._matrix is not None):
+            return self._matrix.getRow(cellId)
+
+        row = self._rows[cellId]
+        if (row is not None):
+            return row
+
+        source = self._cells[cellId]
+        return [self.getDistance(source, target) for target in self._cells]
+
+    def getStats(self):
+        return {
+            'numCells': self._numCells,
+            'progress': self.getProgress(),
+            'rowsComputed': self._rowsComputed if (self._matrix is None) else self._numCells,
+        }
+
+    def hasRow(self, cellId):
+        """
+        Check if the row for the given cell id has been computed
+        (otherwise `IncrementalDistanceMatrix.getRow` has to build it).
+        """
+
+        if (self._matrix is not None):
+            return True
+
+        return (self._rows[cellId] is not None)
+
+    def isComplete(self):
+        return (self._matrix is not None)
+
+def clearCache():
+    """
+    Empty the process-wide distance cache and reset its statistics.
+    """
+
+    _matrixCache.clear()
+    _incrementalMatrices.clear()
+    for key in _cacheStats:
+        _cacheStats[key] = 0
+
+def getCacheStats():
+    """
+    Get the hit, miss, and eviction counts for the process-wide distance cache,
+    along with its current and maximum size.
+    """
+
+    stats = dict(_cacheStats)
+    stats['size'] = len(_matrixCache)
+    stats['maxSize'] = _maxCacheSize
+
+    return stats
+
+def getDistanceMatrix(layout):
+    """
+    Get the `DistanceMatrix` for a layout.
+    Matrices are shared by every caller in the process,
+    so distances are only computed the first time a set of walls is seen.
+    """
+
+    key = layout.walls.getFingerprint()
+
+    matrix = _lookupDistanceMatrix(key, layout.walls)
+    if (matrix is None):
+        matrix = computeDistanceMatrix(layout)
+        _storeDistanceMatrix(key, layout.walls, matrix)
+
+    return matrix
+
+def getIncrementalDistanceMatrix(layout):
+    """
+    Get the `IncrementalDistanceMatrix` for a layout.
+    A matrix that is still being filled in is shared by every caller in the process,
+    so each row is only computed once no matter how many distancers are working on it.
+    """
+
+    key = layout.walls.getFingerprint()
+
+    matrix = _incrementalMatrices.get(key)
+    if (matrix is not None):
+        _incrementalMatrices.move_to_end(key)
+        return matrix
+
+    matrix = IncrementalDistanceMatrix(layout)
+    if (not matrix.isComplete()):
+        _incrementalMatrices[key] = matrix
+        _evictCache()
+
+    return matrix
+
+def getDiskCacheDir():
+    return _diskCacheDir
+
+def setCacheSize(size):
+    """
+    Set the maximum number of layouts the process-wide distance cache holds.
+    """
+
+    global _maxCacheSize
+
+    if (size < 1):
+        raise ValueError("The distance cache must be able to hold at least one layout.")
+
+    _maxCacheSize = size
+    _evictCache()
+
+def setDiskCacheDir(path):
+    """
+    Set the directory for the on-disk distance cache (None turns the disk cache off).
+    The disk cache can also be turned on with the PACAI_DISTANCE_CACHE environment variable.
+
+    Matrices are written once per set of walls and memory-mapped when loaded,
+    so nothing needs to be parsed and the pages are shared between processes.
+    """
+
+    global _diskCacheDir
+
+    if (path is not None):
+        os.makedirs(path, exist_ok = True)
+
+    _diskCacheDir = path
+
+def warmDiskCache(layout):
+    """
+    Make sure that the distances for a layout are in the on-disk cache.
+    Returns True if the distances had to be computed.
+    """
+
+    if (_diskCacheDir is None):
+        raise ValueError("The on-disk distance cache is not turned on.")
+
+    path = _getDiskCachePath(layout.walls.getFingerprint())
+    if (_loadDistanceMatrix(path, layout.walls) is not None):
+        return False
+
+    _saveDistanceMatrix(path, layout.walls, computeDistanceMatrix(layout))
+    return True
+
+def computeDistanceMatrix(layout):
+    """
+    Compute the maze distances between all pairs of open cells in the layout.
+    Since every move has the same cost, a plain BFS is run from each cell.
+    """
+
+    cells = layout.getCells()
+    neighbors = _buildNeighbors(layout)
+
+    distances = array.array('H')
+    for source in range(len(cells)):
+        distances.extend(_breadthFirstDistances(source, neighbors))
+
+    return DistanceMatrix(cells, distances, layout.getCellIds())
+
+def computeDistances(layout):
+    """
+    Get the maze distance between all pairs of open cells as a dict keyed by
+    ((x1, y1), (x2, y2)).
+    Prefer `computeDistanceMatrix`, which is much faster and smaller.
+    """
+
+    matrix = computeDistanceMatrix(layout)
+    cells = matrix.getCells()
+
+    distances = {}
+    for source in cells:
+        for target in cells:
+            distances[(target, source)] = matrix.getDistance(target, source)
 
     return distances
 
@@ -154,3 +732,160 @@ def getDistanceOnGrid(distances, pos1, pos2):
         return distances[key]
 
     return DEFAULT_DISTANCE
+
+def _buildNeighbors(layout):
+    """
+    Get the adjacent cell ids for each cell id (see `pacai.core.layout.Layout.cellId`).
+    """
+
+    return [layout.getNeighborIds(cellId) for cellId in range(layout.getNumCells())]
+
+def _evictCache():
+    while (len(_matrixCache) > _maxCacheSize):
+        _matrixCache.popitem(last = False)
+        _cacheStats['evictions'] += 1
+
+    while (len(_incrementalMatrices) > _maxCacheSize):
+        _incrementalMatrices.popitem(last = False)
+
+def _getDiskCachePath(fingerprint):
+    return os.path.join(_diskCacheDir, fingerprint + DISK_CACHE_EXTENSION)
+
+def _getByteOrderCode():
+    return sys.byteorder[0].encode()
+
+def _loadDistanceMatrix(path, walls):
+    """
+    Memory-map a distance matrix from disk.
+    Returns None if the file is missing or is not usable on this machine.
+    """
+
+    if (not os.path.isfile(path)):
+        return None
+
+    try:
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError) as ex:
+        logging.warning("Could not read cached distances from '%s': %s." % (path, ex))
+        return None
+
+    if (len(data) < _DISK_HEADER.size):
+        data.close()
+        return None
+
+    (magic, version, byteOrder, width, height, numCells) = _DISK_HEADER.unpack_from(data)
+
+    cellsStart = _DISK_HEADER.size
+    distancesStart = cellsStart + (2 * numCells * 2)
+    size = distancesStart + (numCells * numCells * 2)
+
+    if (magic != DISK_CACHE_MAGIC
+            or version != DISK_CACHE_VERSION
+            or byteOrder != _getByteOrderCode()
+            or width != walls.getWidth()
+            or height != walls.getHeight()
+            or numCells != walls.count(False)
+            or len(data) != size):
+        data.close()
+        return None
+
+    view = memoryview(data)
+
+    coordinates = view[cellsStart:distancesStart].cast('H')
+    cells = [(coordinates[2 * i], coordinates[2 * i + 1]) for i in range(numCells)]
+
+    return DistanceMatrix(cells, view[distancesStart:].cast('H'))
+
+def _lookupDistanceMatrix(key, walls):
+    """
+    Get a matrix from the process-wide cache, or from disk (adding it to the process-wide cache).
+    Returns None if the matrix still needs to be computed.
+    """
+
+    matrix = _matrixCache.get(key)
+    if (matrix is not None):
+        _cacheStats['hits'] += 1
+        _matrixCache.move_to_end(key)
+        return matrix
+
+    _cacheStats['misses'] += 1
+
+    if (_diskCacheDir is None):
+        return None
+
+    matrix = _loadDistanceMatrix(_getDiskCachePath(key), walls)
+    if (matrix is None):
+        return None
+
+    _cacheStats['diskHits'] += 1
+
+    _matrixCache[key] = matrix
+    _evictCache()
+
+    return matrix
+
+def _saveDistanceMatrix(path, walls, matrix):
+    """
+    Write a distance matrix to disk.
+    The file is written to a temp file first and then moved into place,
+    so other processes will never see a partial file.
+    """
+
+    coordinates = array.array('H')
+    for cell in matrix.getCells():
+        coordinates.extend(cell)
+
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+
+    try:
+        with open(tempPath, 'wb') as file:
+            file.write(_DISK_HEADER.pack(DISK_CACHE_MAGIC, DISK_CACHE_VERSION,
+                    _getByteOrderCode(), walls.getWidth(), walls.getHeight(),
+                    matrix.getNumCells()))
+            file.write(coordinates)
+            file.write(matrix._distances)
+
+        os.replace(tempPath, path)
+    except OSError as ex:
+        logging.warning("Could not write cached distances to '%s': %s." % (path, ex))
+        return
+
+    _cacheStats['diskWrites'] += 1
+
+def _storeDistanceMatrix(key, walls, matrix):
+    """
+    Put a freshly computed matrix in the process-wide cache (and on disk if enabled).
+    """
+
+    if (_diskCacheDir is not None):
+        _saveDistanceMatrix(_getDiskCachePath(key), walls, matrix)
+
+    _matrixCache[key] = matrix
+    _evictCache()
+
+def _breadthFirstDistances(source, neighbors):
+    """
+    Get the distance from the source cell id to every other cell id.
+    `neighbors` is the list of adjacent cell ids for each cell id.
+    """
+
+    distances = [UNREACHABLE_DISTANCE] * len(neighbors)
+    distances[source] = 0
+
+    frontier = [source]
+    distance = 0
+
+    while (len(frontier) > 0):
+        distance += 1
+        nextFrontier = []
+
+        for cell in frontier:
+            for neighbor in neighbors[cell]:
+                if (distances[neighbor] == UNREACHABLE_DISTANCE):
+                    distances[neighbor] = distance
+                    nextFrontier.append(neighbor)
+
+        frontier = nextFrontier
+
+    return distances
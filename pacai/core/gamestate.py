@@ -1,8 +1,8 @@
 import abc
-import copy
 
 from pacai.core.agentstate import AgentState
 from pacai.core.directions import Directions
+from pacai.core.grid import GridView
 from pacai.util import util
 
 class AbstractGameState(abc.ABC):
@@ -22,10 +22,6 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
-        # Any children should be sure to clear the hash when modifications are made.
-        self._hash = None
-
         # For food and capsules, we will only copy on write (if we eat one of them).
         # This avoid additional copies on successors that don't eat.
 
@@ -33,6 +29,12 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # Kept up to date by eatFood(), so counting food never scans the grid.
+        self._numFood = self._food.count()
+
+        # The read-only view handed out by getFood(), shared until food is eaten.
+        self._foodView = None
+
         self._capsulesCopied = False
         self._capsules = layout.capsules.copy()
         self._lastCapsuleEaten = None
@@ -45,8 +47,17 @@ class AbstractGameState(abc.ABC):
         for (isPacman, position) in layout.agentPositions:
             self._agentStates.append(AgentState(position, Directions.STOP, isPacman))
 
+        # Agent states are also copy on write, but per agent.
+        # Bit i is set when this state owns (and so may modify) the state of agent i.
+        self._agentStatesCopied = (1 << len(self._agentStates)) - 1
+
         self._score = 0
 
+        # A Zobrist key over the score, game over flags, food, and capsules.
+        # Every mutator XORs its changes in and out, so successors never rehash the board.
+        # Agent states keep their own keys (see `AbstractGameState.__hash__`).
+        self._zobrist = self._computeZobrist()
+
     @abc.abstractmethod
     def generateSuccessor(self, agentIndex, action):
         """
@@ -65,8 +76,33 @@ class AbstractGameState(abc.ABC):
         pass
 
     def addScore(self, score):
-        self._hash = None
-        self._score += score
+        self.setScore(self._score + score)
+
+    def applyAction(self, agentIndex, action):
+        """
+        Apply the action for the specified agent to this state IN PLACE,
+        using the same rules as `AbstractGameState.generateSuccessor`.
+        Returns an undo token that can be passed to `AbstractGameState.undo`
+        to exactly restore this state to how it was before the action.
+
+        This allows a tree search to walk a single state instead of allocating a successor per node.
+        Tokens must be undone in the reverse order that they were made.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't apply an action to a terminal state.")
+
+        token = self._saveUndoState()
+
+        # The current food, capsules, and agent states are held by the token,
+        # so they must not be written to.
+        self._foodCopied = False
+        self._capsulesCopied = False
+        self._agentStatesCopied = 0
+
+        self._applySuccessorAction(agentIndex, action)
+
+        return token
 
     def eatCapsule(self, x, y):
         """
@@ -83,7 +119,7 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
-        self._hash = None
+        self._zobrist ^= util.zobristKey('capsule', x, y)
         return True
 
     def eatFood(self, x, y):
@@ -100,15 +136,42 @@ class AbstractGameState(abc.ABC):
 
         self._food[x][y] = False
         self._lastFoodEaten = (x, y)
+        self._numFood -= 1
+        self._foodView = None
 
-        self._hash = None
+        self._zobrist ^= util.zobristKey('food', x, y)
         return True
 
     def endGame(self, win):
+        self._zobrist ^= (util.zobristKey('outcome', self._gameover, self._win)
+                ^ util.zobristKey('outcome', True, win))
+
         self._gameover = True
         self._win = win
 
-        self._hash = None
+    def generateSuccessors(self, agentIndex, actions = None):
+        """
+        Returns a list of (action, successor) pairs, one for each action (in order).
+        If no actions are given, then all of the agent's legal actions are used.
+
+        This gives the same successors as calling `AbstractGameState.generateSuccessor`
+        for each action, but the legal actions are only looked up once for all of them.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't generate successors of a terminal state.")
+
+        legalActions = self.getLegalActions(agentIndex)
+        if (actions is None):
+            actions = legalActions
+
+        successors = []
+        for action in actions:
+            successor = self._initSuccessor()
+            successor._applySuccessorAction(agentIndex, action, legalActions)
+            successors.append((action, successor))
+
+        return successors
 
     def getAgentPosition(self, index):
         """
@@ -122,9 +185,15 @@ class AbstractGameState(abc.ABC):
             return None
 
         # Ensure positions are ints.
-        return tuple(int(pos) for pos in position)
+        return (int(position[0]), int(position[1]))
 
     def getAgentState(self, index):
+        """
+        Get the state of an agent.
+        Agent states may be shared with other game states, so the caller should not modify it
+        (rules should use getMutableAgentState()).
+        """
+
         return self._agentStates[index]
 
     def getAgentStates(self):
@@ -144,7 +213,22 @@ class AbstractGameState(abc.ABC):
         Grids can be accessed via list notation.
         So to check if there is food at (x, y), just do something like: food[x][y].
 
-        Callers should favor hasFood() over this, since this will make a copy of the grid.
+        The returned grid is a read-only `pacai.core.grid.GridView`
+        (use getFoodCopy() to get a grid that can be modified).
+        It is shared by every caller until food is eaten, so its asList() and asSet() are cached.
+        """
+
+        if (self._foodView is None):
+            self._foodView = GridView(self._food)
+
+            # The view holds the current grid, so the next write must go to a copy.
+            self._foodCopied = False
+
+        return self._foodView
+
+    def getFoodCopy(self):
+        """
+        Returns a Grid of boolean food indicator variables that the caller is free to modify.
         """
 
         return self._food.copy()
@@ -183,12 +267,25 @@ class AbstractGameState(abc.ABC):
 
         return len(self._capsules)
 
+    def getMutableAgentState(self, index):
+        """
+        Get the state of an agent that is owned by this game state, so it can be modified.
+        The first call for an agent in a successor makes a copy of that agent's state.
+        """
+
+        mask = 1 << index
+        if (not (self._agentStatesCopied & mask)):
+            self._agentStates[index] = self._agentStates[index].copy()
+            self._agentStatesCopied |= mask
+
+        return self._agentStates[index]
+
     def getNumFood(self):
         """
         Get the amount of food left on the board.
         """
 
-        return self._food.count()
+        return self._numFood
 
     def getScore(self):
         return self._score
@@ -219,6 +316,13 @@ class AbstractGameState(abc.ABC):
 
         return self._food[x][y]
 
+    def hasFoodInCell(self, cellId):
+        """
+        The same as hasFood(), but for a cell id (see `pacai.core.layout.Layout.cellId`).
+        """
+
+        return self._food.getByIndex(self._layout.getGridIndex(cellId))
+
     def hasWall(self, x, y):
         """
         Returns true if (x, y) has a wall, false otherwise.
@@ -239,8 +343,24 @@ class AbstractGameState(abc.ABC):
         self._highlightLocations = list(locations)
 
     def setScore(self, score):
+        self._zobrist ^= util.zobristKey('score', self._score) ^ util.zobristKey('score', score)
         self._score = score
-        self._hash = None
+
+    def undo(self, token):
+        """
+        Undo an action applied by `AbstractGameState.applyAction`.
+        """
+
+        self._restoreUndoState(token)
+
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action, legalActions = None):
+        """
+        Apply the action to the context state (self).
+        If the agent's legal actions are already known, they can be passed in.
+        """
+
+        pass
 
     def _initSuccessor(self):
         """
@@ -248,19 +368,69 @@ class AbstractGameState(abc.ABC):
         Initialize the successor to look like this state.
         """
 
-        # Start with a shallow copy.
-        successor = copy.copy(self)
-        successor._hash = None
+        # Start with a shallow copy (which also carries over the Zobrist key).
+        # This is what copy.copy() does, without the generic dispatch.
+        successor = object.__new__(self.__class__)
+        successor.__dict__.update(self.__dict__)
 
         # Leave food and capsules as a shallow copy, but mark them to be copied on write.
         successor._foodCopied = False
         successor._capsulesCopied = False
 
-        # Agent states need to be deep copied.
-        successor._agentStates = [agentState.copy() for agentState in self._agentStates]
+        # Share the agent states, only the ones that change will get copied.
+        successor._agentStates = list(self._agentStates)
+        successor._agentStatesCopied = 0
 
         return successor
 
+    def _restoreUndoState(self, token):
+        """
+        Restore the fields saved by `AbstractGameState._saveUndoState`.
+        The list of agent states is restored in place, so references to it stay valid.
+        """
+
+        (self._lastAgentMoved, self._gameover, self._win, self._score, self._zobrist,
+                self._food, self._lastFoodEaten, self._numFood,
+                self._capsules, self._lastCapsuleEaten,
+                agentStates) = token
+
+        self._agentStates[:] = agentStates
+
+        # The restored food, capsules, and agent states may have been shared since they were saved,
+        # so the next writes must go to copies.
+        self._foodCopied = False
+        self._foodView = None
+        self._capsulesCopied = False
+        self._agentStatesCopied = 0
+
+    def _saveUndoState(self):
+        """
+        Get an undo token for all the fields that an action can change.
+        Food, capsules, and agent states are copy on write, so only references to them are kept.
+        Children with additional mutable fields should extend the token.
+        """
+
+        return (self._lastAgentMoved, self._gameover, self._win, self._score, self._zobrist,
+                self._food, self._lastFoodEaten, self._numFood,
+                self._capsules, self._lastCapsuleEaten,
+                tuple(self._agentStates))
+
+    def _computeZobrist(self):
+        """
+        Compute the Zobrist key for the non-agent parts of this state from scratch.
+        """
+
+        key = util.zobristKey('score', self._score)
+        key ^= util.zobristKey('outcome', self._gameover, self._win)
+
+        for (x, y) in self._food.iterPositions():
+            key ^= util.zobristKey('food', x, y)
+
+        for (x, y) in self._capsules:
+            key ^= util.zobristKey('capsule', x, y)
+
+        return key
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -288,8 +458,11 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
-        if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+        key = self._zobrist ^ hash(self._layout)
+
+        # Scramble each agent's key by its index, so swapping two agents changes the hash.
+        for agentIndex in range(len(self._agentStates)):
+            agentKey = hash(self._agentStates[agentIndex])
+            key ^= (agentKey * (util.zobristKey('agent', agentIndex) | 1)) & util.ZOBRIST_MASK
 
-        return self._hash
+        return key
@@ -1,8 +1,15 @@
+import hashlib
+
 class Grid:
     """
-    A 2-dimensional array of objects backed by a list of lists.
+    A 2-dimensional array of booleans backed by a single packed integer (a bitboard).
     Data is accessed via grid[x][y] where (x, y) are positions on a Pacman map with x horizontal,
     y vertical and the origin (0, 0) in the bottom left corner.
+
+    The cell (x, y) is stored in bit (x * height + y).
+    Since Python integers are immutable, copying a grid is O(1) and the two grids
+    naturally become independent on the first write (copy-on-write).
+    Columns (grid[x]) are materialized lazily the first time they are accessed.
     """
 
     def __init__(self, width, height, initialValue = False):
@@ -11,74 +18,340 @@ class Grid:
 
         self._width = width
         self._height = height
-        self._data = [[initialValue for y in range(height)] for x in range(width)]
+
+        self._bits = 0
+        if (initialValue):
+            self._bits = (1 << (width * height)) - 1
+
+        self._clearCaches()
 
     def asList(self, key = True):
-        values = []
+        if (not key):
+            return list(self.iterPositions(key))
+
+        if (self._positions is None):
+            self._positions = tuple(self.iterPositions())
+
+        return list(self._positions)
 
-        for x in range(self._width):
-            for y in range(self._height):
-                if self[x][y] == key:
-                    values.append((x, y))
+    def asSet(self):
+        """
+        Get a frozenset of the (x, y) positions that are True.
+        The set is cached until the grid is next written to.
+        """
 
-        return values
+        if (self._positionSet is None):
+            if (self._positions is None):
+                self._positions = tuple(self.iterPositions())
+
+            self._positionSet = frozenset(self._positions)
+
+        return self._positionSet
 
     def copy(self):
-        grid = Grid(self._width, self._height)
-        grid._data = [row.copy() for row in self._data]
+        grid = Grid.__new__(Grid)
+        grid._width = self._width
+        grid._height = self._height
+        grid._bits = self._bits
+
+        grid._columns = [None] * self._width
+        grid._count = self._count
+        grid._hash = self._hash
+        grid._fingerprint = self._fingerprint
+        grid._positions = self._positions
+        grid._positionSet = self._positionSet
+
         return grid
 
-    def count(self, item =True):
-        return sum([x.count(item) for x in self._data])
+    def count(self, item = True):
+        if (self._count is None):
+            self._count = bin(self._bits).count('1')
+
+        if (item):
+            return self._count
+
+        return self._width * self._height - self._count
 
     def deepCopy(self):
         return self.copy()
 
+    @staticmethod
+    def fromBytes(width, height, data):
+        """
+        Build a grid from the bytes returned by `Grid.toBytes`.
+        """
+
+        grid = Grid(width, height)
+        grid._bits = int.from_bytes(data, 'little')
+
+        return grid
+
+    def getByIndex(self, index):
+        """
+        Get the value of a cell by its index in the packed data (x * height + y).
+        """
+
+        return bool((self._bits >> index) & 1)
+
+    def getFingerprint(self):
+        """
+        Get a string that identifies the contents of this grid.
+        Unlike the hash, the fingerprint is stable across processes.
+        """
+
+        if (self._fingerprint is None):
+            data = '%d,%d,%x' % (self._width, self._height, self._bits)
+            self._fingerprint = hashlib.sha1(data.encode()).hexdigest()
+
+        return self._fingerprint
+
     def getHeight(self):
         return self._height
 
     def getWidth(self):
         return self._width
 
+    def iterPositions(self, key = True):
+        """
+        Iterate over the (x, y) positions whose value matches the key.
+        Positions are generated in the same order as asList(): by x, then y.
+        Only the matching cells are visited.
+        """
+
+        bits = self._bits
+        if (not key):
+            bits ^= (1 << (self._width * self._height)) - 1
+
+        height = self._height
+        while (bits):
+            lowBit = bits & -bits
+            index = lowBit.bit_length() - 1
+            bits ^= lowBit
+
+            yield (index // height, index % height)
+
     def shallowCopy(self):
-        grid = Grid(self._width, self._height)
-        grid._data = self._data
-        return grid
+        # The packed data is immutable, so a shallow copy is the same as a copy.
+        return self.copy()
+
+    def toBytes(self):
+        """
+        Get the packed cells as little-endian bytes (cell (x, y) is bit (x * height + y)).
+        """
+
+        return self._bits.to_bytes((self._width * self._height + 7) // 8, 'little')
+
+    def _buildColumn(self, x):
+        height = self._height
+        columnBits = (self._bits >> (x * height)) & ((1 << height) - 1)
+
+        column = _GridColumn(bool((columnBits >> y) & 1) for y in range(height))
+        column._grid = self
+        column._x = x
+
+        self._columns[x] = column
+        return column
 
     def _cellIndexToPosition(self, index):
-        x = index / self._height
+        x = index // self._height
         y = index % self._height
 
         return x, y
 
+    def _clearCaches(self):
+        self._columns = [None] * self._width
+        self._count = None
+        self._hash = None
+        self._fingerprint = None
+        self._positions = None
+        self._positionSet = None
+
+    def _setCell(self, x, y, value):
+        """
+        Set a single cell in the packed data.
+        Any materialized column is expected to have already been updated by the caller.
+        """
+
+        mask = 1 << (x * self._height + y)
+        if (bool(self._bits & mask) == value):
+            return
+
+        self._bits ^= mask
+        self._hash = None
+        self._fingerprint = None
+        self._positions = None
+        self._positionSet = None
+
+        if (self._count is not None):
+            if (value):
+                self._count += 1
+            else:
+                self._count -= 1
+
     def __eq__(self, other):
         if (other is None):
             return False
 
-        return self._data == other._data
+        if (isinstance(other, GridView)):
+            other = other._grid
+
+        return (self._bits == other._bits
+                and self._width == other._width
+                and self._height == other._height)
 
     def __getitem__(self, i):
-        return self._data[i]
+        column = self._columns[i]
+        if (column is None):
+            if (i < 0):
+                i += self._width
 
-    def __hash__(self):
-        hashcode = 0
-        base = 1
+            column = self._buildColumn(i)
+
+        return column
 
-        for row in self._data:
-            for value in row:
-                if (value):
-                    hashcode += base
-                base *= 2
+    def __getstate__(self):
+        # Columns hold a reference back to the grid and are trivially rebuilt.
+        return (self._width, self._height, self._bits)
 
-        return hash(hashcode)
+    def __hash__(self):
+        # The packed bits are the same value the list-backed grid used to build cell by cell.
+        if (self._hash is None):
+            self._hash = hash(self._bits)
+
+        return self._hash
 
     def __lt__(self, other):
         return self.__hash__() < other.__hash__()
 
     def __setitem__(self, key, item):
-        self._data[key] = item
+        if (key < 0):
+            key += self._width
+
+        height = self._height
+        base = key * height
+        columnBits = 0
+        for y in range(height):
+            if (item[y]):
+                columnBits |= (1 << y)
+
+        mask = ((1 << height) - 1) << base
+        self._bits = (self._bits & ~mask) | (columnBits << base)
+
+        # A column that is still held elsewhere no longer belongs to this grid.
+        column = self._columns[key]
+        if (column is not None):
+            column._grid = None
+
+        self._columns[key] = None
+        self._count = None
+        self._hash = None
+        self._fingerprint = None
+        self._positions = None
+        self._positionSet = None
+
+    def __setstate__(self, state):
+        self._width, self._height, self._bits = state
+        self._clearCaches()
 
     def __str__(self):
-        out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
+        out = [[str(self[x][y])[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+class GridView(object):
+    """
+    A read-only view of a `Grid`, handed out instead of a copy.
+    Supports all of the grid's read methods, columns (view[x]) are tuples.
+    Use `GridView.copy` to get a `Grid` that can be modified.
+
+    The owner of the grid must not write to it while views of it are in use
+    (game states copy their food on write, so they never do).
+    """
+
+    def __init__(self, grid):
+        self._grid = grid
+        self._columns = [None] * grid.getWidth()
+
+    def asList(self, key = True):
+        return self._grid.asList(key)
+
+    def asSet(self):
+        return self._grid.asSet()
+
+    def copy(self):
+        return self._grid.copy()
+
+    def count(self, item = True):
+        return self._grid.count(item)
+
+    def deepCopy(self):
+        return self._grid.copy()
+
+    def getFingerprint(self):
+        return self._grid.getFingerprint()
+
+    def getHeight(self):
+        return self._grid.getHeight()
+
+    def getWidth(self):
+        return self._grid.getWidth()
+
+    def iterPositions(self, key = True):
+        return self._grid.iterPositions(key)
+
+    def shallowCopy(self):
+        return self._grid.copy()
+
+    def __eq__(self, other):
+        return self._grid.__eq__(other)
+
+    def __getitem__(self, i):
+        column = self._columns[i]
+        if (column is None):
+            column = tuple(self._grid[i])
+            self._columns[i] = column
+
+        return column
+
+    def __hash__(self):
+        return self._grid.__hash__()
+
+    def __lt__(self, other):
+        return self.__hash__() < other.__hash__()
+
+    def __str__(self):
+        return self._grid.__str__()
+
+class _GridColumn(list):
+    """
+    A single column of a `Grid`.
+    Reads are plain list reads, writes are also pushed into the owning grid's packed data.
+    Once the grid replaces the column (grid[x] = ...), the column is detached
+    and writes to it only change the column.
+    """
+
+    def __setitem__(self, y, value):
+        if (isinstance(y, slice)):
+            values = list(self)
+            values[y] = value
+
+            if (len(values) != len(self)):
+                raise ValueError("Cannot change the height of a grid column.")
+
+            for (index, cellValue) in enumerate(values):
+                self[index] = cellValue
+
+            return
+
+        if (y < 0):
+            y += len(self)
+
+        value = bool(value)
+        super().__setitem__(y, value)
+
+        if (self._grid is not None):
+            self._grid._setCell(self._x, y, value)
+
+    def __reduce__(self):
+        # Detached columns pickle as plain lists.
+        return (list, (list(self), ))
@@ -0,0 +1,201 @@
+"""
+A maze distance oracle that contracts a layout into a graph of junctions.
+
+Most mazes are made up of corridors (cells with exactly two open neighbors)
+that run between a much smaller number of junctions (all other cells).
+Every open cell is anchored to the two junctions at the ends of its corridor
+(a junction is anchored to itself), so only the distances between junctions need to be stored.
+"""
+
+import array
+import heapq
+
+from pacai.core.distanceCalculator import CellIndex
+from pacai.core.distanceCalculator import UNREACHABLE_DISTANCE
+from pacai.core.distanceCalculator import _buildNeighbors
+
+# The corridor id used for cells that are junctions.
+NO_CORRIDOR = -1
+
+class JunctionGraph(CellIndex):
+    """
+    Exact maze distances for a layout, answered from the distances between junctions.
+    Precomputation is O(junctions^2) in time and space instead of O(cells^2).
+
+    This supports the same queries as `pacai.core.distanceCalculator.DistanceMatrix`,
+    so it can be used behind a `pacai.core.distanceCalculator.Distancer`
+    (see `pacai.core.distanceCalculator.MODE_JUNCTIONS`).
+    """
+
+    def __init__(self, layout):
+        super().__init__(layout.getCells(), layout.getCellIds())
+        self._neighbors = _buildNeighbors(layout)
+
+        # The cell id of each junction.
+        self._junctions = []
+
+        # For each cell id: (corridor id, junction A, distance to A, junction B, distance to B).
+        self._anchors = [None] * self._numCells
+
+        # {junction: {other junction: length of the shortest corridor between them}}.
+        self._edges = []
+
+        self._numCorridors = 0
+
+        self._findJunctions()
+        self._junctionDistances = self._computeJunctionDistances()
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the distance between two open cells.
+        Raises a KeyError if either position is not an open cell.
+        """
+
+        return self._getDistance(self._cellIds[pos1], self._cellIds[pos2])
+
+    def getDistanceById(self, cellId1, cellId2):
+        return self._getDistance(cellId1, cellId2)
+
+    def getJunctions(self):
+        """
+        Get the positions of all the junctions.
+        """
+
+        return [self._cells[cellId] for cellId in self._junctions]
+
+    def getRow(self, cellId):
+        """
+        Get the distances from the given cell id to every other cell id.
+        """
+
+        return [self._getDistance(cellId, target) for target in range(self._numCells)]
+
+    def getStats(self):
+        return {
+            'numCells': self._numCells,
+            'numCorridors': self._numCorridors,
+            'numJunctions': len(self._junctions),
+        }
+
+    def hasRow(self, cellId):
+        """
+        Rows are never held, they are built from the junction distances.
+        """
+
+        return False
+
+    def _addJunction(self, cellId):
+        junction = len(self._junctions)
+
+        self._junctions.append(cellId)
+        self._anchors[cellId] = (NO_CORRIDOR, junction, 0, junction, 0)
+        self._edges.append({})
+
+    def _addEdge(self, junction1, junction2, length):
+        if (length < self._edges[junction1].get(junction2, UNREACHABLE_DISTANCE)):
+            self._edges[junction1][junction2] = length
+            self._edges[junction2][junction1] = length
+
+    def _computeJunctionDistances(self):
+        """
+        Run Dijkstra's algorithm over the junction graph from every junction.
+        """
+
+        numJunctions = len(self._junctions)
+        distances = array.array('H', [UNREACHABLE_DISTANCE]) * (numJunctions * numJunctions)
+
+        for source in range(numJunctions):
+            offset = source * numJunctions
+            distances[offset + source] = 0
+
+            queue = [(0, source)]
+            while (len(queue) > 0):
+                distance, junction = heapq.heappop(queue)
+                if (distance > distances[offset + junction]):
+                    continue
+
+                for (neighbor, length) in self._edges[junction].items():
+                    newDistance = distance + length
+                    if (newDistance < distances[offset + neighbor]):
+                        distances[offset + neighbor] = newDistance
+                        heapq.heappush(queue, (newDistance, neighbor))
+
+        return distances
+
+    def _findJunctions(self):
+        for cellId in range(self._numCells):
+            if (len(self._neighbors[cellId]) != 2):
+                self._addJunction(cellId)
+
+        junction = 0
+        while (junction < len(self._junctions)):
+            self._walkCorridors(junction)
+            junction += 1
+
+            # A loop of corridor cells with no junctions on it gets one of its cells promoted.
+            if (junction == len(self._junctions)):
+                for cellId in range(self._numCells):
+                    if (self._anchors[cellId] is None):
+                        self._addJunction(cellId)
+                        break
+
+    def _getDistance(self, source, target):
+        (sourceCorridor, sourceA, sourceToA, sourceB, sourceToB) = self._anchors[source]
+        (targetCorridor, targetA, targetToA, targetB, targetToB) = self._anchors[target]
+
+        best = UNREACHABLE_DISTANCE
+
+        # Cells on the same corridor can go directly.
+        if (sourceCorridor == targetCorridor and sourceCorridor != NO_CORRIDOR):
+            best = abs(sourceToA - targetToA)
+
+        numJunctions = len(self._junctions)
+        distances = self._junctionDistances
+
+        for (sourceJunction, sourceOffset) in ((sourceA, sourceToA), (sourceB, sourceToB)):
+            row = sourceJunction * numJunctions
+            for (targetJunction, targetOffset) in ((targetA, targetToA), (targetB, targetToB)):
+                distance = sourceOffset + distances[row + targetJunction] + targetOffset
+                if (distance < best):
+                    best = distance
+
+        return best
+
+    def _walkCorridors(self, junction):
+        """
+        Follow every corridor leaving the given junction and anchor the cells along it.
+        """
+
+        start = self._junctions[junction]
+
+        for nextCell in self._neighbors[start]:
+            previousCell = start
+            corridor = []
+
+            while (self._anchors[nextCell] is None):
+                corridor.append(nextCell)
+
+                # Corridor cells have exactly two neighbors, keep going the way we were going.
+                (first, second) = self._neighbors[nextCell]
+                if (first == previousCell):
+                    previousCell, nextCell = nextCell, second
+                else:
+                    previousCell, nextCell = nextCell, first
+
+            endAnchor = self._anchors[nextCell]
+            if (endAnchor[0] != NO_CORRIDOR):
+                # We walked into a corridor that was already anchored (from its other end).
+                continue
+
+            endJunction = endAnchor[1]
+            length = len(corridor) + 1
+
+            if (len(corridor) > 0):
+                corridorId = self._numCorridors
+                self._numCorridors += 1
+
+                for (offset, cellId) in enumerate(corridor):
+                    self._anchors[cellId] = (corridorId, junction, offset + 1,
+                            endJunction, length - (offset + 1))
+
+            self._addEdge(junction, endJunction, length)
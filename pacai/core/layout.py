@@ -1,6 +1,10 @@
+import logging
 import os
 import random
+import struct
 
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
 from pacai.core.distance import manhattan
 from pacai.core.grid import Grid
 
@@ -9,22 +13,132 @@ DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '
 
 GHOST_NUMS = ['1', '2', '3', '4']
 
+LAYOUT_EXTENSION = '.lay'
+
+# A compiled layout sits next to its text layout (e.g. tinyMaze.layc for tinyMaze.lay).
+COMPILED_LAYOUT_EXTENSION = '.layc'
+COMPILED_LAYOUT_MAGIC = b'PACLAY'
+COMPILED_LAYOUT_VERSION = 1
+
+# The header of a compiled layout:
+# magic, version, padding, width, height, number of items, length of the text.
+# The header is followed by the packed walls and food (see `pacai.core.grid.Grid.toBytes`),
+# then each item (character, x, y) in the order the text is scanned, and finally the text itself.
+# Items are all the characters besides walls and food that processLayoutChar() cares about.
+_COMPILED_HEADER = struct.Struct('<6sBxHHHI')
+_COMPILED_ITEM = struct.Struct('<cHH')
+
+# Layouts loaded by getLayout(), keyed by (path, maxGhosts).
+_layoutCache = {}
+
+# Visibility indexes (see `Layout.getVisibility`) shared by every layout with the same walls,
+# keyed by the fingerprint of the walls.
+_visibilityCache = {}
+
 class Layout(object):
     """
     A Layout manages the static information about the game board.
     """
 
     def __init__(self, layoutText, maxGhosts = None):
-        self.width = len(layoutText[0])
-        self.height = len(layoutText)
-        self.walls = Grid(self.width, self.height, initialValue = False)
-        self.food = Grid(self.width, self.height, initialValue = False)
-        self.capsules = []
-        self.agentPositions = []
-        self.numGhosts = 0
-        self.layoutText = layoutText
+        self._initFields(layoutText)
 
         self.processLayoutText(layoutText, maxGhosts)
+        self._buildMoveTables()
+
+    def cellId(self, x, y):
+        """
+        Get the integer id of the open cell at (x, y), or None if (x, y) is not an open cell.
+        Open cells are numbered from 0 in the order of `walls.asList(False)`.
+        """
+
+        return self._cellIds.get((x, y))
+
+    def getCardinalMoves(self, cellId):
+        """
+        Get the (action, neighbor cell id) pairs for the non-stop moves out of a cell,
+        in the order of `pacai.core.directions.Directions.CARDINAL`.
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        return self._cardinalMoves[cellId]
+
+    def getCellActions(self, cellId):
+        """
+        The same as getPossibleActions() (which does not depend on direction on the grid),
+        but for a cell id.
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        return self._cellActions[cellId]
+
+    def getCellIds(self):
+        """
+        Get a dict of every open cell (x, y) to its id.
+        The caller should not modify the dict.
+        """
+
+        return self._cellIds
+
+    def getCells(self):
+        """
+        Get the positions of all the open cells, indexed by their id.
+        The caller should not modify the list.
+        """
+
+        return self._cells
+
+    def getGhostActions(self, position, direction):
+        """
+        Get the actions a ghost at the given position and facing the given direction may take.
+        Ghosts cannot stop, and cannot turn around unless they are at a dead end.
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        actions = self._ghostActions.get((position, direction))
+        if (actions is None):
+            actions = Layout._filterGhostActions(
+                    Actions.getPossibleActions(position, direction, self.walls), direction)
+
+        return actions
+
+    def getGridIndex(self, cellId):
+        """
+        Get the index of a cell in a `pacai.core.grid.Grid` the size of this layout
+        (see `pacai.core.grid.Grid.getByIndex`).
+        """
+
+        return self._gridIndexes[cellId]
+
+    def getLegalNeighbors(self, position):
+        """
+        Get the positions reachable in one move (including staying put) from the given position.
+        This matches `pacai.core.actions.Actions.getLegalNeighbors` on this layout's walls.
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        neighbors = self._neighbors.get(position)
+        if (neighbors is None):
+            neighbors = tuple(Actions.getLegalNeighbors(position, self.walls))
+
+        return neighbors
+
+    def getNeighborIds(self, cellId):
+        """
+        Get the ids of the open cells adjacent to a cell (not including the cell itself),
+        in the same order as getLegalNeighbors().
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        return self._neighborIds[cellId]
+
+    def getNumCells(self):
+        return len(self._cells)
 
     def getNumGhosts(self):
         return self.numGhosts
@@ -39,6 +153,29 @@ class Layout(object):
     def getWidth(self):
         return self.width
 
+    def getPossibleActions(self, position, direction):
+        """
+        Get the actions an agent at the given position and facing the given direction may take.
+        This matches `pacai.core.actions.Actions.getPossibleActions` on this layout's walls,
+        but positions on the grid are answered from a table that is built once per layout.
+
+        The returned tuple is shared and must not be modified.
+        """
+
+        actions = self._possibleActions.get(position)
+        if (actions is None):
+            # Off the grid (or between grid points).
+            actions = tuple(Actions.getPossibleActions(position, direction, self.walls))
+
+        return actions
+
+    def position(self, cellId):
+        """
+        Get the (x, y) position of a cell id.
+        """
+
+        return self._cells[cellId]
+
     def getRandomLegalPosition(self):
         x = random.choice(list(range(self.width)))
         y = random.choice(list(range(self.height)))
@@ -68,15 +205,64 @@ class Layout(object):
         dist, pos = max([(manhattan(p, pacPos), p) for p in poses])
         return pos
 
+    def getVisibility(self):
+        """
+        Get the visibility index for this layout: {(x, y): {direction: frozenset of positions}}.
+        From an open cell facing a direction, an agent can see its own cell
+        and every cell in a straight line ahead of it up to the first wall.
+        Facing STOP, an agent can only see its own cell.
+
+        The index is built the first time it is needed and is shared by all layouts with the same walls.
+        """
+
+        if (self.visibility is None):
+            key = self.walls.getFingerprint()
+
+            visibility = _visibilityCache.get(key)
+            if (visibility is None):
+                visibility = self._buildVisibility()
+                _visibilityCache[key] = visibility
+
+            self.visibility = visibility
+
+        return self.visibility
+
     def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
-        row, col = [int(x) for x in pacPos]
-        return ghostPos in self.visibility[row][col][pacDirection]
+        """
+        Check if an agent at ghostPos can be seen by pacman at pacPos facing pacDirection.
+        Positions between grid points are truncated to the grid (like the original lookup).
+        """
+
+        pacPos = tuple(int(x) for x in pacPos)
+        ghostPos = tuple(int(x) for x in ghostPos)
+
+        directions = self.getVisibility().get(pacPos)
+        if (directions is None):
+            # Pacman is not in an open cell.
+            return False
+
+        return ghostPos in directions[pacDirection]
 
     def __str__(self):
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        layout = Layout.__new__(Layout)
+        layout.__dict__.update(self.__dict__)
+
+        # Grids are copy on write.
+        layout.walls = self.walls.copy()
+        layout.food = self.food.copy()
+        layout.capsules = self.capsules.copy()
+        layout.agentPositions = self.agentPositions.copy()
+        layout.layoutText = self.layoutText[:]
+
+        # Everything derived from the walls gets its own copy,
+        # so the walls of either layout can be changed without affecting the other.
+        layout._buildMoveTables()
+        layout.visibility = None
+
+        return layout
 
     def processLayoutText(self, layoutText, maxGhosts):
         """
@@ -94,13 +280,10 @@ class Layout(object):
         Other characters are ignored.
         """
 
-        maxY = self.height - 1
-        for y in range(self.height):
-            for x in range(self.width):
-                layoutChar = layoutText[maxY - y][x]
-                self.processLayoutChar(x, y, layoutChar, maxGhosts)
-        self.agentPositions.sort()
-        self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
+        for (x, y, layoutChar) in _scanLayoutText(layoutText):
+            self.processLayoutChar(x, y, layoutChar, maxGhosts)
+
+        self._finishAgentPositions()
 
     def processLayoutChar(self, x, y, layoutChar, maxGhosts):
         if (layoutChar == '%'):
@@ -118,14 +301,270 @@ class Layout(object):
             self.agentPositions.append((int(layoutChar), (x, y)))
             self.numGhosts += 1
 
+    def _finishAgentPositions(self):
+        self.agentPositions.sort()
+        self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
+
+    def _initFields(self, layoutText):
+        self.width = len(layoutText[0])
+        self.height = len(layoutText)
+        self.walls = Grid(self.width, self.height, initialValue = False)
+        self.food = Grid(self.width, self.height, initialValue = False)
+        self.capsules = []
+        self.agentPositions = []
+        self.numGhosts = 0
+        self.layoutText = layoutText
+
+        # Built on demand by getVisibility().
+        self.visibility = None
+
+    def _buildVisibility(self):
+        visibility = {}
+
+        for (x, y) in self.walls.iterPositions(False):
+            directions = {Directions.STOP: frozenset([(x, y)])}
+
+            for direction, (dx, dy) in Actions._directionsAsList:
+                if (direction == Directions.STOP):
+                    continue
+
+                visible = [(x, y)]
+
+                nextX = x + dx
+                nextY = y + dy
+                while (0 <= nextX < self.width and 0 <= nextY < self.height
+                        and not self.walls[nextX][nextY]):
+                    visible.append((nextX, nextY))
+                    nextX += dx
+                    nextY += dy
+
+                directions[direction] = frozenset(visible)
+
+            visibility[(x, y)] = directions
+
+        return visibility
+
+    def _buildMoveTables(self):
+        """
+        Number the open cells and precompute the legal moves for every open cell.
+        Moves off the edge of the board are treated as moving into a wall.
+        """
+
+        self._cells = self.walls.asList(False)
+        self._cellIds = {cell: cellId for (cellId, cell) in enumerate(self._cells)}
+        self._gridIndexes = [x * self.height + y for (x, y) in self._cells]
+
+        self._possibleActions = {}
+        self._neighbors = {}
+        self._ghostActions = {}
+
+        self._cellActions = []
+        self._neighborIds = []
+        self._cardinalMoves = []
+
+        for (x, y) in self._cells:
+            actions = []
+            neighbors = []
+
+            for direction, (dx, dy) in Actions._directionsAsList:
+                nextX = x + dx
+                nextY = y + dy
+
+                if (nextX < 0 or nextX >= self.width or nextY < 0 or nextY >= self.height):
+                    continue
+
+                if (not self.walls[nextX][nextY]):
+                    actions.append(direction)
+                    neighbors.append((nextX, nextY))
+
+            self._possibleActions[(x, y)] = tuple(actions)
+            self._neighbors[(x, y)] = tuple(neighbors)
+
+            self._cellActions.append(self._possibleActions[(x, y)])
+            self._neighborIds.append(tuple([self._cellIds[neighbor] for neighbor in neighbors
+                    if neighbor != (x, y)]))
+
+            moves = dict(zip(actions, neighbors))
+            self._cardinalMoves.append(tuple([(action, self._cellIds[moves[action]])
+                    for action in Directions.CARDINAL if action in moves]))
+
+            for direction in Actions._directions:
+                self._ghostActions[((x, y), direction)] = Layout._filterGhostActions(actions,
+                        direction)
+
+    @staticmethod
+    def _filterGhostActions(actions, direction):
+        actions = [action for action in actions if action != Directions.STOP]
+
+        reverse = Actions.reverseDirection(direction)
+        if (reverse in actions and len(actions) > 1):
+            actions.remove(reverse)
+
+        return tuple(actions)
+
+def clearLayoutCache():
+    """
+    Forget all the layouts loaded by getLayout(), and all the visibility indexes.
+    """
+
+    _layoutCache.clear()
+    _visibilityCache.clear()
+
+def compileLayout(path):
+    """
+    Compile the text layout at the given path,
+    and write it next to the text layout (with COMPILED_LAYOUT_EXTENSION).
+    Returns the path of the compiled layout,
+    or None if it could not be written (the text layout is used instead).
+    """
+
+    layoutText = _readLayoutText(path)
+
+    # Parse with the layout's own rules, and keep the characters that became capsules or agents
+    # (in scan order, so loading applies maxGhosts the same way parsing does).
+    layout = Layout.__new__(Layout)
+    layout._initFields(layoutText)
+
+    items = []
+    for (x, y, layoutChar) in _scanLayoutText(layoutText):
+        numItems = len(layout.capsules) + len(layout.agentPositions)
+        layout.processLayoutChar(x, y, layoutChar, None)
+
+        if (len(layout.capsules) + len(layout.agentPositions) > numItems):
+            items.append(_COMPILED_ITEM.pack(layoutChar.encode(), x, y))
+
+    text = '\n'.join(layoutText).encode()
+
+    compiledPath = _getCompiledPath(path)
+
+    # Write to a temp file first and then move it into place,
+    # so a reader never sees a partial file.
+    tempPath = '%s.%d.tmp' % (compiledPath, os.getpid())
+
+    try:
+        with open(tempPath, 'wb') as file:
+            file.write(_COMPILED_HEADER.pack(COMPILED_LAYOUT_MAGIC, COMPILED_LAYOUT_VERSION,
+                    layout.width, layout.height, len(items), len(text)))
+            file.write(layout.walls.toBytes())
+            file.write(layout.food.toBytes())
+            file.write(b''.join(items))
+            file.write(text)
+
+        os.replace(tempPath, compiledPath)
+    except OSError as ex:
+        # E.g. the layouts are installed somewhere read-only, the text layout still works.
+        logging.warning("Could not write compiled layout to '%s': %s." % (compiledPath, ex))
+
+        if (os.path.isfile(tempPath)):
+            os.remove(tempPath)
+
+        return None
+
+    return compiledPath
+
 def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
-    if (not name.endswith('.lay')):
-        name += '.lay'
+    """
+    Load a layout by name.
+    Layouts are cached for the whole process, so the returned layout is shared
+    and must not be modified (see `Layout.deepCopy`).
+    If there is an up-to-date compiled version of the layout (see compileLayout()),
+    then it is loaded instead of parsing the text.
+    """
+
+    if (not name.endswith(LAYOUT_EXTENSION)):
+        name += LAYOUT_EXTENSION
 
     path = os.path.join(layout_dir, name)
+
+    key = (os.path.abspath(path), maxGhosts)
+    layout = _layoutCache.get(key)
+    if (layout is not None):
+        return layout
+
     if (not os.path.isfile(path)):
         raise Exception("Could not locate layout file: '%s'." % (path))
 
+    layout = _loadCompiledLayout(path, maxGhosts)
+    if (layout is None):
+        layout = Layout(_readLayoutText(path), maxGhosts)
+
+    _layoutCache[key] = layout
+    return layout
+
+def _getCompiledPath(path):
+    return os.path.splitext(path)[0] + COMPILED_LAYOUT_EXTENSION
+
+def _loadCompiledLayout(path, maxGhosts):
+    """
+    Load the compiled version of the text layout at the given path.
+    Returns None if there is no compiled layout, it is older than the text,
+    or it is not the size its header says it is.
+    """
+
+    compiledPath = _getCompiledPath(path)
+    if (not os.path.isfile(compiledPath)
+            or os.path.getmtime(compiledPath) < os.path.getmtime(path)):
+        return None
+
+    with open(compiledPath, 'rb') as file:
+        data = file.read()
+
+    if (len(data) < _COMPILED_HEADER.size):
+        return None
+
+    (magic, version, width, height, numItems, textLength) = _COMPILED_HEADER.unpack_from(data)
+    if (magic != COMPILED_LAYOUT_MAGIC or version != COMPILED_LAYOUT_VERSION):
+        return None
+
+    gridSize = (width * height + 7) // 8
+    size = (_COMPILED_HEADER.size + (2 * gridSize) + (numItems * _COMPILED_ITEM.size)
+            + textLength)
+
+    if (len(data) != size):
+        return None
+
+    offset = _COMPILED_HEADER.size
+
+    walls = data[offset:(offset + gridSize)]
+    offset += gridSize
+
+    food = data[offset:(offset + gridSize)]
+    offset += gridSize
+
+    items = list(_COMPILED_ITEM.iter_unpack(data[offset:(offset + numItems * _COMPILED_ITEM.size)]))
+    offset += numItems * _COMPILED_ITEM.size
+
+    text = data[offset:(offset + textLength)].decode()
+
+    layout = Layout.__new__(Layout)
+    layout._initFields(text.split('\n'))
+    layout.walls = Grid.fromBytes(width, height, walls)
+    layout.food = Grid.fromBytes(width, height, food)
+
+    # Replaying the items in the original order gives the same capsules and agents as parsing.
+    for (layoutChar, x, y) in items:
+        layout.processLayoutChar(x, y, layoutChar.decode(), maxGhosts)
+
+    layout._finishAgentPositions()
+    layout._buildMoveTables()
+
+    return layout
+
+def _scanLayoutText(layoutText):
+    """
+    Get (x, y, character) for every character of the layout text,
+    with the text's rows flipped to the (x, y) convention.
+    """
+
+    height = len(layoutText)
+    maxY = height - 1
+
+    for y in range(height):
+        row = layoutText[maxY - y]
+        for x in range(len(layoutText[0])):
+            yield (x, y, row[x])
+
+def _readLayoutText(path):
     rows = []
     with open(path, 'r') as file:
         for line in file:
@@ -133,4 +572,4 @@ def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
             if (line != ''):
                 rows.append(line)
 
-    return Layout(rows, maxGhosts)
+    return rows
@@ -0,0 +1,258 @@
+"""
+A reference best-first search engine.
+
+Every one-sided search here runs through `bestFirstSearch`,
+only the priority function changes between BFS, UCS, A*, and greedy search.
+Nodes are kept in flat lists and only store a pointer to their parent,
+so the path is only built once the goal is reached.
+The frontier holds each state at most once, a better path to a waiting state lowers its key.
+Ties are broken by the smaller heuristic estimate and then by insertion order,
+so the same problem always produces the same path.
+`bidirectionalSearch` searches from both ends of problems that have a single goal.
+
+Use these in a `pacai.agents.search.base.SearchAgent` by name, e.g.
+`--agent-args fn=pacai.core.search.engine.astar,heuristic=pacai.core.search.heuristic.manhattan`.
+"""
+
+from pacai.core.actions import Actions
+from pacai.core.search.heuristic import null as nullHeuristic
+from pacai.util.priorityQueue import IndexedPriorityQueue
+
+def breadthFirstPriority(cost, depth, estimate):
+    return depth
+
+def uniformCostPriority(cost, depth, estimate):
+    return cost
+
+def aStarPriority(cost, depth, estimate):
+    return cost + estimate
+
+def greedyPriority(cost, depth, estimate):
+    return estimate
+
+def bestFirstSearch(problem, priorityFunction, heuristic = nullHeuristic):
+    """
+    Search the node with the lowest priority first.
+    The priority function takes the cost of the path to a node, the number of actions in that path,
+    and the heuristic estimate for the node's state.
+    Returns a list of actions that reaches the goal, or an empty list if there is no goal.
+
+    When a state is reached by a path with a lower priority, the node is relinked to that path.
+    This includes states that were already expanded,
+    which only happens with inconsistent heuristics.
+    """
+
+    start = problem.startingState()
+
+    # Node information, indexed by node id.
+    states = [start]
+    parents = [-1]
+    actions = [None]
+    costs = [0]
+    depths = [0]
+    estimates = [heuristic(start, problem)]
+    priorities = [priorityFunction(0, 0, estimates[0])]
+
+    # {state: node id}
+    nodeIds = {start: 0}
+
+    frontier = IndexedPriorityQueue()
+    frontier.push(0, (priorities[0], estimates[0]))
+
+    while (not frontier.isEmpty()):
+        node = frontier.pop()
+        state = states[node]
+
+        if (problem.isGoal(state)):
+            return _buildPath(node, parents, actions)
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            cost = costs[node] + stepCost
+            depth = depths[node] + 1
+
+            nextNode = nodeIds.get(successor)
+            if (nextNode is None):
+                estimate = heuristic(successor, problem)
+                priority = priorityFunction(cost, depth, estimate)
+
+                nextNode = len(states)
+                nodeIds[successor] = nextNode
+
+                states.append(successor)
+                parents.append(node)
+                actions.append(action)
+                costs.append(cost)
+                depths.append(depth)
+                estimates.append(estimate)
+                priorities.append(priority)
+
+                frontier.push(nextNode, (priority, estimate))
+                continue
+
+            priority = priorityFunction(cost, depth, estimates[nextNode])
+            if (priority >= priorities[nextNode]):
+                continue
+
+            # A better path to a known state.
+            parents[nextNode] = node
+            actions[nextNode] = action
+            costs[nextNode] = cost
+            depths[nextNode] = depth
+            priorities[nextNode] = priority
+
+            # Lowers the key of a waiting node, or reopens an expanded one.
+            frontier.push(nextNode, (priority, estimates[nextNode]))
+
+    return []
+
+def bidirectionalSearch(problem):
+    """
+    Search for the cheapest path from both the start and the goal at the same time,
+    always expanding the side with the smaller frontier.
+    The search stops once no path through the frontiers can beat the best path found so far.
+    For BFS/UCS on unit costs, this usually expands far fewer states than searching from one side.
+
+    The problem must have a single goal (`pacai.core.search.problem.SearchProblem.goalState`)
+    and symmetric moves (`pacai.core.search.problem.SearchProblem.isSymmetric`),
+    otherwise this falls back to `uniformCostSearch`.
+    Both sides expand states through `pacai.core.search.problem.SearchProblem.successorStates`,
+    so the expanded count and visit history include both searches.
+    """
+
+    goal = problem.goalState()
+    if (goal is None or not problem.isSymmetric()):
+        return uniformCostSearch(problem)
+
+    start = problem.startingState()
+    if (problem.isGoal(start)):
+        return []
+
+    forward = _SearchSide(start)
+    backward = _SearchSide(goal)
+
+    bestCost = None
+    meeting = None
+
+    while (not forward.frontier.isEmpty() and not backward.frontier.isEmpty()):
+        if (bestCost is not None
+                and (forward.frontier.peekPriority() + backward.frontier.peekPriority())
+                    >= bestCost):
+            break
+
+        if (len(forward.frontier) <= len(backward.frontier)):
+            (side, other) = (forward, backward)
+        else:
+            (side, other) = (backward, forward)
+
+        state = side.frontier.pop()
+        side.closed.add(state)
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor in side.closed):
+                continue
+
+            cost = side.costs[state] + stepCost
+            if (successor in side.costs and cost >= side.costs[successor]):
+                continue
+
+            side.costs[successor] = cost
+            side.parents[successor] = (state, action)
+            side.frontier.push(successor, cost)
+
+            if (successor in other.costs):
+                totalCost = cost + other.costs[successor]
+                if (bestCost is None or totalCost < bestCost):
+                    bestCost = totalCost
+                    meeting = successor
+
+    if (meeting is None):
+        return []
+
+    # The backward half was found from the goal, so its moves are walked in reverse.
+    path = forward.getPath(meeting)
+    state = meeting
+    while (state != goal):
+        (state, action) = backward.parents[state]
+        path.append(Actions.reverseDirection(action))
+
+    return path
+
+def breadthFirstSearch(problem):
+    """
+    Search the shallowest nodes in the search tree first.
+    """
+
+    return bestFirstSearch(problem, breadthFirstPriority)
+
+def uniformCostSearch(problem):
+    """
+    Search the node of least total cost first.
+    """
+
+    return bestFirstSearch(problem, uniformCostPriority)
+
+def aStarSearch(problem, heuristic = nullHeuristic):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+    """
+
+    return bestFirstSearch(problem, aStarPriority, heuristic)
+
+def greedySearch(problem, heuristic = nullHeuristic):
+    """
+    Search the node that has the lowest heuristic first.
+    The path found is not guaranteed to be the cheapest one.
+    """
+
+    return bestFirstSearch(problem, greedyPriority, heuristic)
+
+def _buildPath(node, parents, actions):
+    path = []
+
+    while (parents[node] != -1):
+        path.append(actions[node])
+        node = parents[node]
+
+    path.reverse()
+    return path
+
+class _SearchSide(object):
+    """
+    One direction of a bidirectional search.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+        # {state: cost of the best known path from the root}
+        self.costs = {root: 0}
+
+        # {state: (previous state, action)}
+        self.parents = {}
+
+        self.closed = set()
+
+        self.frontier = IndexedPriorityQueue()
+        self.frontier.push(root, 0)
+
+    def getPath(self, state):
+        """
+        Get the actions from the root to the given state.
+        """
+
+        path = []
+
+        while (state != self.root):
+            (state, action) = self.parents[state]
+            path.append(action)
+
+        path.reverse()
+        return path
+
+# Abbreviations
+
+bfs = breadthFirstSearch
+bidirectional = bidirectionalSearch
+ucs = uniformCostSearch
+astar = aStarSearch
+greedy = greedySearch
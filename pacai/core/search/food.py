@@ -9,8 +9,8 @@ class FoodSearchProblem(SearchProblem):
 
     A search state in this problem is a tuple (pacmanPosition, foodGrid).
     Wwhere pacmanPosition is a tuple (x, y) of integers specifying Pacman's position,
-    and foodGrid is a `pacai.core.grid.Grid` of either `True` or `False`,
-    specifying remaining food.
+    and foodGrid is a `pacai.core.grid.Grid` (or read-only `pacai.core.grid.GridView`)
+    of either `True` or `False`, specifying remaining food.
     """
 
     def __init__(self, startingGameState):
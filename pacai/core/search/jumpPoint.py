@@ -0,0 +1,185 @@
+"""
+Jump Point Search for uniform-cost, 4-connected grids (like the pacman board).
+
+A* on a grid expands every cell along a corridor or across an open room,
+even though most of those cells offer no choice that a shorter path could not also make.
+Jump Point Search only considers shortest paths in a canonical form,
+where a vertical move is never followed by a horizontal one unless a wall forced the turn
+(otherwise the two moves could be swapped).
+Cells where canonical paths can branch are the only ones expanded (the "jump points"),
+and the cells between them are skipped over by scanning in a straight line.
+The paths found have the same cost as the ones A* finds.
+"""
+
+from pacai.core.actions import Actions
+from pacai.core.distance import manhattan
+from pacai.core.search import engine
+from pacai.util.priorityQueue import IndexedPriorityQueue
+
+HORIZONTAL_DIRECTIONS = [(1, 0), (-1, 0)]
+VERTICAL_DIRECTIONS = [(0, 1), (0, -1)]
+
+def findPath(walls, start, goal):
+    """
+    Find a shortest path between two open positions using the walls `pacai.core.grid.Grid`.
+    Returns the actions of the path (or None if there is no path),
+    and the jump points that were expanded (in the order they were expanded).
+    """
+
+    grid = _WallGrid(walls)
+
+    if (start == goal):
+        return [], []
+
+    # The A* nodes are (jump point, the direction it was reached in),
+    # since the direction decides which ways the search can continue.
+    # The path between two jump points is a straight line.
+    startNode = (start, None)
+    parents = {startNode: None}
+    costs = {startNode: 0}
+    expanded = []
+
+    frontier = IndexedPriorityQueue()
+    frontier.push(startNode, (manhattan(start, goal), manhattan(start, goal)))
+
+    while (not frontier.isEmpty()):
+        node = frontier.pop()
+        (point, arrival) = node
+
+        if (point == goal):
+            return _buildPath(node, parents), expanded
+
+        expanded.append(point)
+
+        for direction in _getDirections(grid, point, arrival):
+            jumpPoint = _jump(grid, point, direction, goal)
+            if (jumpPoint is None):
+                continue
+
+            nextNode = (jumpPoint, direction)
+            cost = costs[node] + manhattan(point, jumpPoint)
+            if (nextNode in costs and cost >= costs[nextNode]):
+                continue
+
+            costs[nextNode] = cost
+            parents[nextNode] = node
+
+            estimate = manhattan(jumpPoint, goal)
+            frontier.push(nextNode, (cost + estimate, estimate))
+
+    return None, expanded
+
+def jumpPointSearch(problem):
+    """
+    Search a problem on the pacman board with Jump Point Search.
+    The problem needs the board's walls (as `walls`),
+    a single goal (`pacai.core.search.problem.SearchProblem.goalState`),
+    and symmetric moves (`pacai.core.search.problem.SearchProblem.isSymmetric`),
+    e.g. a `pacai.core.search.position.PositionSearchProblem` with the default cost function.
+    Other problems fall back to `pacai.core.search.engine.uniformCostSearch`.
+
+    Only the jump points are counted as expanded (and highlighted in the GUI).
+    """
+
+    goal = problem.goalState()
+    if (goal is None or not problem.isSymmetric() or not hasattr(problem, 'walls')):
+        return engine.uniformCostSearch(problem)
+
+    actions, expanded = findPath(problem.walls, problem.startingState(), goal)
+
+    for point in expanded:
+        problem.recordExpansion(point)
+
+    if (actions is None):
+        return []
+
+    return actions
+
+def _buildPath(node, parents):
+    actions = []
+
+    while (parents[node] is not None):
+        parent = parents[node]
+        (point, direction) = node
+
+        # Jump points are connected by straight lines.
+        steps = manhattan(point, parent[0])
+        actions += [Actions.vectorToDirection(direction)] * steps
+
+        node = parent
+
+    actions.reverse()
+    return actions
+
+def _getDirections(grid, point, direction):
+    """
+    Get the directions to search from a jump point that was reached while moving in a direction.
+    """
+
+    if (direction is None):
+        return HORIZONTAL_DIRECTIONS + VERTICAL_DIRECTIONS
+
+    (dx, dy) = direction
+    (x, y) = point
+
+    # A horizontal move can be followed by any move except going back.
+    if (dy == 0):
+        return [direction] + VERTICAL_DIRECTIONS
+
+    # A vertical move can only turn when a wall stopped the turn from happening earlier.
+    directions = [direction]
+    for (sideX, sideY) in HORIZONTAL_DIRECTIONS:
+        if (grid.isOpen(x + sideX, y) and not grid.isOpen(x + sideX, y - dy)):
+            directions.append((sideX, sideY))
+
+    return directions
+
+def _jump(grid, point, direction, goal):
+    """
+    Scan from a point in a direction, and return the first jump point (or None).
+    """
+
+    (x, y) = point
+    (dx, dy) = direction
+
+    while (True):
+        x += dx
+        y += dy
+
+        if (not grid.isOpen(x, y)):
+            return None
+
+        if ((x, y) == goal):
+            return (x, y)
+
+        if (dy == 0):
+            # Moving horizontally, any turn is allowed.
+            # This is a jump point if turning leads to one.
+            for vertical in VERTICAL_DIRECTIONS:
+                if (_jump(grid, (x, y), vertical, goal) is not None):
+                    return (x, y)
+        else:
+            # Moving vertically, this is a jump point if a wall forces a turn here.
+            for sideX in (1, -1):
+                if (grid.isOpen(x + sideX, y) and not grid.isOpen(x + sideX, y - dy)):
+                    return (x, y)
+
+class _WallGrid(object):
+    """
+    Bounds checked access to the walls (everything off the board is a wall).
+    """
+
+    def __init__(self, walls):
+        self._walls = walls
+        self._width = walls.getWidth()
+        self._height = walls.getHeight()
+
+    def isOpen(self, x, y):
+        if (x < 0 or y < 0 or x >= self._width or y >= self._height):
+            return False
+
+        return not self._walls[x][y]
+
+# Abbreviations
+
+jps = jumpPointSearch
@@ -27,6 +27,11 @@ class PositionSearchProblem(SearchProblem):
         self.goal = goal
         self.costFn = costFn
 
+        # Moves between open cells come from the layout's tables.
+        self._layout = gameState.getInitialLayout()
+        self._cellIds = self._layout.getCellIds()
+        self._cells = self._layout.getCells()
+
         self.startState = start
         if (self.startState is None):
             self.startState = gameState.getAgentPosition(0)
@@ -34,8 +39,12 @@ class PositionSearchProblem(SearchProblem):
         if (self.startState is None):
             raise ValueError("Could not find starting location.")
 
-    def startingState(self):
-        return self.startState
+    def goalState(self):
+        # A subclass with its own goal test may have any number of goals.
+        if (type(self).isGoal is not PositionSearchProblem.isGoal):
+            return None
+
+        return self.goal
 
     def isGoal(self, state):
         if (state != self.goal):
@@ -51,6 +60,18 @@ class PositionSearchProblem(SearchProblem):
 
         return True
 
+    def isSymmetric(self):
+        """
+        Moves are only symmetric with the default (uniform) cost function,
+        since the cost of a move depends on the cell it moves into.
+        """
+
+        return (self.costFn is DEFAULT_COST_FUNCTION
+                and type(self).successorStates is PositionSearchProblem.successorStates)
+
+    def startingState(self):
+        return self.startState
+
     def successorStates(self, state):
         """
         Returns successor states, the actions they require, and a constant cost of 1.
@@ -58,16 +79,23 @@ class PositionSearchProblem(SearchProblem):
 
         successors = []
 
-        for action in Directions.CARDINAL:
-            x, y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-
-            if (not self.walls[nextx][nexty]):
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-
-                successors.append((nextState, action, cost))
+        cellId = self._cellIds.get(state)
+        if (cellId is not None):
+            for (action, nextId) in self._layout.getCardinalMoves(cellId):
+                nextState = self._cells[nextId]
+                successors.append((nextState, action, self.costFn(nextState)))
+        else:
+            # Not an open cell (e.g. off the grid).
+            for action in Directions.CARDINAL:
+                x, y = state
+                dx, dy = Actions.directionToVector(action)
+                nextx, nexty = int(x + dx), int(y + dy)
+
+                if (not self.walls[nextx][nexty]):
+                    nextState = (nextx, nexty)
+                    cost = self.costFn(nextState)
+
+                    successors.append((nextState, action, cost))
 
         # Bookkeeping for display purposes (the highlight in the GUI).
         self._numExpanded += 1
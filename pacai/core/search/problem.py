@@ -49,6 +49,17 @@ class SearchProblem(abc.ABC):
     def getVisitHistory(self):
         return self._visitHistory
 
+    def goalState(self):
+        """
+        Returns the only goal state,
+        or None if this problem does not have exactly one known goal state.
+
+        Bidirectional searches (see `pacai.core.search.engine.bidirectionalSearch`)
+        start a second search from this state.
+        """
+
+        return None
+
     @abc.abstractmethod
     def isGoal(self, state):
         """
@@ -60,6 +71,30 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def isSymmetric(self):
+        """
+        Returns True if every move can be undone at the same cost.
+        That is, if `SearchProblem.successorStates` gives (successor, action, cost) for a state,
+        then it gives (state, `pacai.core.actions.Actions.reverseDirection`(action), cost)
+        for the successor.
+
+        Bidirectional searches need this to search backwards from the goal.
+        """
+
+        return False
+
+    def recordExpansion(self, coordinates):
+        """
+        Count an expanded search node and remember its coordinates for the GUI highlight.
+        This is for searches that expand nodes without calling `SearchProblem.successorStates`.
+        """
+
+        self._numExpanded += 1
+
+        if (coordinates not in self._visitedLocations):
+            self._visitedLocations.add(coordinates)
+            self._visitHistory.append(coordinates)
+
     @abc.abstractmethod
     def startingState(self):
         """
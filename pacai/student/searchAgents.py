@@ -173,7 +173,7 @@ class ClosestDotSearchAgent(SearchAgent):
 
         currentState = state
 
-        while (currentState.getFood().count() > 0):
+        while (currentState.getNumFood() > 0):
             nextPathSegment = self.findPathToClosestDot(currentState)
             self._actions += nextPathSegment
 
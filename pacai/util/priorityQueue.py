@@ -13,17 +13,22 @@ class PriorityQueue(object):
 
     Note that this PriorityQueue does not allow you to change the priority of an item.
     However, you may insert the same item multiple times with different priorities.
+    (See `IndexedPriorityQueue` for a queue that can.)
+    Items with equal priorities are popped in the order they were pushed.
     """
 
     def __init__(self):
         self.heap = []
 
+        # Breaks ties between equal priorities, so items are never compared.
+        self._count = 0
+
     def push(self, item, priority):
-        pair = (priority, item)
-        heapq.heappush(self.heap, pair)
+        heapq.heappush(self.heap, (priority, self._count, item))
+        self._count += 1
 
     def pop(self):
-        (priority, item) = heapq.heappop(self.heap)
+        (priority, count, item) = heapq.heappop(self.heap)
         return item
 
     def isEmpty(self):
@@ -56,3 +61,132 @@ class PriorityQueueWithFunction(PriorityQueue):
 
     def __len__(self):
         return len(self.heap)
+
+class IndexedPriorityQueue(object):
+    """
+    A priority queue that holds each item at most once and can lower the priority of a waiting item.
+    Items must be hashable.
+    Items with equal priorities are popped in the order they were pushed.
+
+    This is a binary heap that keeps track of where each item is in the heap,
+    so `IndexedPriorityQueue.decreaseKey` is O(log n) and `IndexedPriorityQueue.contains` is O(1).
+    """
+
+    def __init__(self):
+        # [(priority, count, item), ...]
+        self.heap = []
+
+        # {item: index in the heap}
+        self._indexes = {}
+
+        # Breaks ties between equal priorities, so items are never compared.
+        self._count = 0
+
+    def contains(self, item):
+        return item in self._indexes
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of an item that is in the queue.
+        Raises a ValueError if the new priority is higher than the current one.
+        """
+
+        index = self._indexes[item]
+        (oldPriority, count, item) = self.heap[index]
+
+        if (oldPriority < priority):
+            raise ValueError("Cannot raise the priority of an item from %s to %s." %
+                    (str(oldPriority), str(priority)))
+
+        self.heap[index] = (priority, count, item)
+        self._siftUp(index)
+
+    def getPriority(self, item):
+        return self.heap[self._indexes[item]][0]
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def peekPriority(self):
+        """
+        Get the lowest priority in the queue, without removing its item.
+        """
+
+        return self.heap[0][0]
+
+    def pop(self):
+        heap = self.heap
+
+        (priority, count, item) = heap[0]
+        del self._indexes[item]
+
+        last = heap.pop()
+        if (len(heap) > 0):
+            heap[0] = last
+            self._indexes[last[2]] = 0
+            self._siftDown(0)
+
+        return item
+
+    def push(self, item, priority):
+        """
+        Add an item to the queue.
+        If the item is already in the queue, it keeps the lower of the two priorities.
+        """
+
+        if (item in self._indexes):
+            if (priority < self.getPriority(item)):
+                self.decreaseKey(item, priority)
+            return
+
+        self.heap.append((priority, self._count, item))
+        self._count += 1
+
+        self._indexes[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+    def _siftDown(self, index):
+        heap = self.heap
+        indexes = self._indexes
+
+        entry = heap[index]
+        size = len(heap)
+
+        while (True):
+            child = 2 * index + 1
+            if (child >= size):
+                break
+
+            if (child + 1 < size and heap[child + 1] < heap[child]):
+                child += 1
+
+            if (not (heap[child] < entry)):
+                break
+
+            heap[index] = heap[child]
+            indexes[heap[index][2]] = index
+            index = child
+
+        heap[index] = entry
+        indexes[entry[2]] = index
+
+    def _siftUp(self, index):
+        heap = self.heap
+        indexes = self._indexes
+
+        entry = heap[index]
+
+        while (index > 0):
+            parent = (index - 1) // 2
+            if (not (entry < heap[parent])):
+                break
+
+            heap[index] = heap[parent]
+            indexes[heap[index][2]] = index
+            index = parent
+
+        heap[index] = entry
+        indexes[entry[2]] = index
+
+    def __len__(self):
+        return len(self.heap)
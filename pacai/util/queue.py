@@ -2,20 +2,23 @@
 A queue container data structure.
 """
 
+import collections
+
 class Queue(object):
     """
     A container with a first-in-first-out (FIFO) queuing policy.
+    Both ends of a deque are O(1), so pushing and popping do not depend on the size of the queue.
     """
 
     def __init__(self):
-        self.list = []
+        self.list = collections.deque()
 
     def push(self, item):
         """
         Enqueue the item into the queue.
         """
 
-        self.list.insert(0, item)
+        self.list.appendleft(item)
 
     def pop(self):
         """
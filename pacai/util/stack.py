@@ -2,13 +2,16 @@
 A stack data structure.
 """
 
+import collections
+
 class Stack(object):
     """
     A container with a last-in-first-out (LIFO) queuing policy.
+    This is backed by a deque to match `pacai.util.queue.Queue`.
     """
 
     def __init__(self):
-        self.list = []
+        self.list = collections.deque()
 
     def push(self, item):
         """
@@ -2,9 +2,16 @@
 Various utility functions.
 """
 
+import hashlib
+
 INITIAL_HASH_VALUE = 17
 HASH_MULTIPLIER = 37
 
+ZOBRIST_MASK = (1 << 64) - 1
+
+# Zobrist keys that have already been derived: {components: key}.
+_zobristKeys = {}
+
 def arrayInvert(array):
     """
     Inverts a matrix stored as a list of lists.
@@ -64,3 +71,20 @@ def sign(x):
         return 1
     else:
         return -1
+
+def zobristKey(*components):
+    """
+    Get the Zobrist key for a single feature of a state (e.g. ('food', x, y)).
+    Keys are pseudo-random 64-bit integers derived from the components alone,
+    so they are the same in every process (and pickled keys stay valid),
+    and the hash of a state can be updated in O(1) by XORing keys in and out
+    as features are added and removed.
+    """
+
+    key = _zobristKeys.get(components)
+    if (key is None):
+        digest = hashlib.blake2b(repr(components).encode(), digest_size = 8).digest()
+        key = int.from_bytes(digest, 'little')
+        _zobristKeys[components] = key
+
+    return key
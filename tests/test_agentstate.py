@@ -0,0 +1,89 @@
+import os
+import pickle
+import subprocess
+import sys
+import unittest
+
+from pacai.core.agentstate import AgentState
+from pacai.core.directions import Directions
+
+"""
+Test agent states.
+"""
+class AgentStateTest(unittest.TestCase):
+    def test_copy(self):
+        state = AgentState((1, 1), Directions.STOP, True)
+        state.updatePosition((1, 0))
+        state.setScaredTimer(3)
+
+        copy = state.copy()
+        self.assertEqual(state, copy)
+        self.assertEqual(hash(state), hash(copy))
+
+        copy.updatePosition((0, 1))
+        self.assertEqual((2, 1), state.getPosition())
+        self.assertEqual((2, 2), copy.getPosition())
+        self.assertEqual(Directions.NORTH, copy.getDirection())
+        self.assertNotEqual(state, copy)
+
+        # The copy still knows where it started.
+        copy.respawn()
+        self.assertEqual(AgentState((1, 1), Directions.STOP, True), copy)
+
+    def test_update(self):
+        state = AgentState((1, 1), Directions.STOP, False)
+
+        state.updatePosition((0.5, 0))
+        self.assertEqual((1.5, 1), state.getPosition())
+        self.assertEqual(Directions.EAST, state.getDirection())
+
+        # Standing still keeps the old direction.
+        state.updatePosition((0, 0))
+        self.assertEqual(Directions.EAST, state.getDirection())
+
+        state.snapToNearestPoint()
+        self.assertEqual((2, 1), state.getPosition())
+
+        expected = AgentState((1, 1), Directions.STOP, False)
+        expected.updatePosition((1, 0))
+        self.assertEqual(expected, state)
+        self.assertEqual(hash(expected), hash(state))
+
+    def test_slots(self):
+        state = AgentState((1, 1), Directions.STOP, True)
+
+        with self.assertRaises(AttributeError):
+            state.extra = 1
+
+        loaded = pickle.loads(pickle.dumps(state))
+        self.assertEqual(state, loaded)
+        self.assertEqual(hash(state), hash(loaded))
+
+    def test_pickle_other_process(self):
+        # Zobrist keys do not depend on the order they are first used in,
+        # so a state pickled by another process keeps a valid key.
+        script = '; '.join([
+            'import pickle, sys',
+            'from pacai.util import util',
+            'util.zobristKey("unrelated")',
+            'from pacai.core.agentstate import AgentState',
+            'from pacai.core.directions import Directions',
+            'state = AgentState((1, 1), Directions.STOP, True)',
+            'state.updatePosition((1, 0))',
+            'sys.stdout.buffer.write(pickle.dumps(state))',
+        ])
+
+        root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+        environment = dict(os.environ, PYTHONPATH = root)
+        output = subprocess.run([sys.executable, '-c', script], env = environment,
+                check = True, stdout = subprocess.PIPE).stdout
+
+        state = AgentState((1, 1), Directions.STOP, True)
+        state.updatePosition((1, 0))
+
+        loaded = pickle.loads(output)
+        self.assertEqual(state, loaded)
+        self.assertEqual(hash(state), hash(loaded))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,15 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 from pacai.bin import capture
+from pacai.bin import distances
 from pacai.bin import gridworld
+from pacai.bin import layouts
 from pacai.bin import pacman
+from pacai.core import distanceCalculator
+from pacai.core import layout
 
 """
 This is a test class to assess the executables of this project.
@@ -41,6 +48,28 @@ class BinTest(unittest.TestCase):
             if status.code != 0:
                 self.fail("Error occured when running --help.")
 
+    def test_distances(self):
+        # Cache the distances for a layout, and then play a game using the cache.
+        with tempfile.TemporaryDirectory() as cacheDir:
+            distances.main(['--cache-dir', cacheDir, 'defaultCapture'])
+            capture.main(['--null-graphics', '--distance-cache', cacheDir])
+
+            distanceCalculator.setDiskCacheDir(None)
+            distanceCalculator.clearCache()
+
+    def test_layouts(self):
+        # Compile a layout, and then play a game with it.
+        with tempfile.TemporaryDirectory() as layoutDir:
+            shutil.copy(os.path.join(layout.DEFAULT_LAYOUT_DIR, 'tinyMaze.lay'), layoutDir)
+
+            layouts.main(['--layout-dir', layoutDir])
+            self.assertTrue(os.path.isfile(os.path.join(layoutDir, 'tinyMaze.layc')))
+
+            compiled = layout.getLayout('tinyMaze', layout_dir = layoutDir)
+            self.assertEqual(layout.getLayout('tinyMaze').walls, compiled.walls)
+
+            layout.clearLayoutCache()
+
     def test_gridworld(self):
         # Run game of gridworld with default agents.
         gridworld.main(['--null-graphics'])
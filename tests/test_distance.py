@@ -0,0 +1,312 @@
+import tempfile
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core.distance import manhattan
+from pacai.core.junctionGraph import JunctionGraph
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+"""
+Test maze distances.
+"""
+class DistanceTest(unittest.TestCase):
+    def _referenceDistances(self, layout, source):
+        distances = {source: 0}
+        frontier = [source]
+
+        while (len(frontier) > 0):
+            nextFrontier = []
+            for (x, y) in frontier:
+                for neighbor in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+                    if (neighbor not in distances and not layout.isWall(neighbor)):
+                        distances[neighbor] = distances[(x, y)] + 1
+                        nextFrontier.append(neighbor)
+
+            frontier = nextFrontier
+
+        return distances
+
+    def test_distance_matrix(self):
+        for name in ['tinyMaze', 'mediumClassic', 'tinyCapture']:
+            layout = getLayout(name)
+            matrix = distanceCalculator.computeDistanceMatrix(layout)
+            cells = layout.walls.asList(False)
+
+            self.assertEqual(cells, matrix.getCells())
+
+            for source in cells:
+                expected = self._referenceDistances(layout, source)
+                for target in cells:
+                    self.assertEqual(
+                            expected.get(target, distanceCalculator.UNREACHABLE_DISTANCE),
+                            matrix.getDistance(source, target))
+
+    def test_distancer(self):
+        layout = getLayout('tinyCapture')
+        distancer = distanceCalculator.Distancer(layout)
+
+        # Before maze distances are computed, manhattan distance is used.
+        self.assertFalse(distancer.isReadyForMazeDistance())
+        self.assertEqual(2, distancer.getDistance((1, 1), (2, 2)))
+
+        distancer.getMazeDistances()
+        self.assertTrue(distancer.isReadyForMazeDistance())
+
+        cells = layout.walls.asList(False)
+        expected = self._referenceDistances(layout, cells[0])
+        for target in cells:
+            self.assertEqual(expected[target], distancer.getDistance(cells[0], target))
+
+        # Positions between grid points snap to the closest grid points.
+        (x, y) = cells[0]
+        self.assertEqual(0.5, distancer.getDistance((x, y + 0.5), (x, y + 1)))
+
+        with self.assertRaises(Exception):
+            distancer.getDistanceOnGrid((0, 0), cells[0])
+
+    def test_shared_cache(self):
+        distanceCalculator.clearCache()
+
+        layout = getLayout('tinyCapture')
+        first = distanceCalculator.Distancer(layout)
+        first.getMazeDistances()
+
+        # A separately loaded copy of the same layout shares the same distances.
+        second = distanceCalculator.Distancer(getLayout('tinyCapture'))
+        second.getMazeDistances()
+
+        self.assertIs(first._distances, second._distances)
+
+        stats = distanceCalculator.getCacheStats()
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['size'])
+
+    def test_cache_eviction(self):
+        distanceCalculator.clearCache()
+        distanceCalculator.setCacheSize(1)
+
+        try:
+            distanceCalculator.getDistanceMatrix(getLayout('tinyCapture'))
+            distanceCalculator.getDistanceMatrix(getLayout('tinyMaze'))
+            distanceCalculator.getDistanceMatrix(getLayout('tinyCapture'))
+        finally:
+            distanceCalculator.setCacheSize(distanceCalculator.DEFAULT_CACHE_SIZE)
+
+        stats = distanceCalculator.getCacheStats()
+        self.assertEqual(3, stats['misses'])
+        self.assertEqual(0, stats['hits'])
+        self.assertEqual(2, stats['evictions'])
+
+    def test_disk_cache(self):
+        layout = getLayout('tinyCapture')
+        expected = distanceCalculator.computeDistanceMatrix(layout)
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            distanceCalculator.clearCache()
+            distanceCalculator.setDiskCacheDir(cacheDir)
+
+            try:
+                distanceCalculator.getDistanceMatrix(layout)
+
+                # A fresh process would only have the disk cache.
+                distanceCalculator.clearCache()
+                matrix = distanceCalculator.getDistanceMatrix(layout)
+
+                self.assertFalse(distanceCalculator.warmDiskCache(layout))
+            finally:
+                distanceCalculator.setDiskCacheDir(None)
+
+            stats = distanceCalculator.getCacheStats()
+            self.assertEqual(1, stats['diskHits'])
+
+            self.assertEqual(expected.getCells(), matrix.getCells())
+            for source in expected.getCells():
+                for target in expected.getCells():
+                    self.assertEqual(expected.getDistance(source, target),
+                            matrix.getDistance(source, target))
+
+            # Release the mapping before the directory is removed.
+            del matrix
+            distanceCalculator.clearCache()
+
+    def test_lazy(self):
+        layout = getLayout('mediumClassic')
+        expected = distanceCalculator.computeDistanceMatrix(layout)
+        cells = expected.getCells()
+
+        distancer = distanceCalculator.Distancer(layout, mode = distanceCalculator.MODE_LAZY,
+                maxLazyRows = 4)
+        distancer.getMazeDistances()
+
+        for source in cells[:10]:
+            for target in cells:
+                self.assertEqual(expected.getDistance(source, target),
+                        distancer.getDistance(source, target))
+
+        stats = distancer.getStats()
+        self.assertEqual(10, stats['rowsComputed'])
+        self.assertEqual(6, stats['rowsEvicted'])
+        self.assertEqual(4, stats['rowsCached'])
+
+        # Distances are symmetric, so a held row answers queries in either direction.
+        distancer.getDistance(cells[-1], cells[9])
+        self.assertEqual(10, distancer.getStats()['rowsComputed'])
+
+    def test_junctions(self):
+        # A loop with no junctions on it and a cell that cannot reach the rest of the maze.
+        loops = Layout([
+            '%%%%%%%',
+            '%...%.%',
+            '%.%.%%%',
+            '%...%P%',
+            '%%%%%%%',
+        ])
+
+        for layout in [getLayout('mediumClassic'), getLayout('bigMaze'),
+                getLayout('defaultCapture'), loops]:
+            expected = distanceCalculator.computeDistanceMatrix(layout)
+            graph = JunctionGraph(layout)
+            cells = expected.getCells()
+
+            self.assertEqual(cells, graph.getCells())
+            self.assertLess(graph.getStats()['numJunctions'], len(cells))
+
+            for source in cells:
+                cellId = expected.getCellId(source)
+                self.assertEqual(list(expected.getRow(cellId)), graph.getRow(cellId))
+
+        distancer = distanceCalculator.Distancer(loops, mode = distanceCalculator.MODE_JUNCTIONS)
+        distancer.getMazeDistances()
+        self.assertEqual(4, distancer.getDistance((1, 1), (3, 3)))
+        self.assertEqual(distanceCalculator.UNREACHABLE_DISTANCE,
+                distancer.getDistance((1, 1), (5, 1)))
+
+    def test_incremental(self):
+        layout = getLayout('mediumClassic')
+        expected = distanceCalculator.computeDistanceMatrix(layout)
+        cells = expected.getCells()
+
+        distanceCalculator.clearCache()
+
+        distancer = distanceCalculator.Distancer(layout,
+                mode = distanceCalculator.MODE_INCREMENTAL)
+        self.assertFalse(distancer.computeMazeDistances(0))
+        self.assertEqual(0.0, distancer.getProgress())
+
+        # Nothing is computed yet.
+        self.assertEqual(manhattan(cells[0], cells[-1]), distancer.getDistance(cells[0], cells[-1]))
+
+        engine = distancer._distances
+        while (engine.getStats()['rowsComputed'] < 3):
+            engine.computeRows(0.000001)
+
+        self.assertLess(distancer.getProgress(), 1.0)
+        for source in cells[:3]:
+            for target in cells:
+                self.assertEqual(expected.getDistance(source, target),
+                        distancer.getDistance(source, target))
+                self.assertEqual(expected.getDistance(source, target),
+                        distancer.getDistance(target, source))
+
+        # Sources without a row are answered per target, without building a whole row.
+        source = cells[-1]
+        sourceId = engine.getCellId(source)
+        self.assertFalse(engine.hasRow(sourceId))
+        self.assertEqual([distancer.getDistance(source, target) for target in cells[:5]],
+                distancer.getDistances(source, cells[:5]))
+        self.assertEqual((cells[-1], 0), distancer.nearest(source, [cells[0], cells[-1]]))
+        self.assertFalse(engine.hasRow(sourceId))
+
+        # Another distancer on the same walls continues the same rows.
+        shared = distanceCalculator.Distancer(layout.deepCopy(),
+                mode = distanceCalculator.MODE_INCREMENTAL)
+        shared.computeMazeDistances(0)
+        self.assertIs(engine, shared._distances)
+        self.assertEqual(distancer.getProgress(), shared.getProgress())
+
+        # Asking for all the distances finishes the work already started.
+        distancer.getMazeDistances()
+        self.assertIs(engine, distancer._distances)
+        self.assertEqual(1.0, distancer.getProgress())
+
+        self.assertTrue(distancer.computeMazeDistances(60))
+        self.assertEqual(1.0, distancer.getProgress())
+        for source in cells:
+            self.assertEqual(list(expected.getRow(expected.getCellId(source))),
+                    distancer.getDistances(source, cells))
+
+        self.assertEqual(1.0, shared.getProgress())
+
+        # The finished matrix is shared with the rest of the process.
+        self.assertEqual(1, distanceCalculator.getCacheStats()['size'])
+        other = distanceCalculator.Distancer(layout, mode = distanceCalculator.MODE_INCREMENTAL)
+        other.getMazeDistances()
+        self.assertEqual(1.0, other.getProgress())
+
+        distanceCalculator.clearCache()
+
+    def test_cached_maze(self):
+        layout = getLayout('mediumClassic')
+        state = PacmanGameState(layout)
+        expected = distanceCalculator.computeDistanceMatrix(layout)
+        cells = expected.getCells()
+
+        distance.clearMazeCache()
+
+        for source in cells[::5]:
+            for target in cells:
+                self.assertEqual(expected.getDistance(source, target),
+                        distance.cachedMaze(source, target, state))
+
+        # The search based maze distance agrees.
+        for target in cells[::17]:
+            self.assertEqual(expected.getDistance(cells[0], target),
+                    distance.maze(cells[0], target, state))
+            self.assertEqual(expected.getDistance(cells[0], target),
+                    distance.maze(cells[0], target, state, bidirectional = True))
+
+        # One BFS per source, shared by every state with the same walls.
+        self.assertEqual(1, len(distance._mazeCache))
+        distances = distance._mazeCache[layout.walls.getFingerprint()]
+        self.assertEqual(len(cells[::5]), distances.getStats()['rowsComputed'])
+
+        with self.assertRaises(ValueError):
+            distance.cachedMaze((0, 0), cells[0], state)
+
+        distance.clearMazeCache()
+        self.assertEqual(0, len(distance._mazeCache))
+
+    def test_batch(self):
+        layout = getLayout('mediumCapture')
+        cells = layout.walls.asList(False)
+        targets = cells[::7] + [(cells[3][0], cells[3][1] + 0.5)]
+
+        for mode in distanceCalculator.MODES:
+            distancer = distanceCalculator.Distancer(layout, mode = mode)
+            distancer.getMazeDistances()
+
+            for source in cells[::11]:
+                expected = [distancer.getDistance(source, target) for target in targets]
+                self.assertEqual(expected, distancer.getDistances(source, targets))
+
+                nearest, distance = distancer.nearest(source, targets)
+                self.assertEqual(min(expected), distance)
+                self.assertEqual(targets[expected.index(distance)], nearest)
+
+            table = distancer.getPairwiseDistances(cells[:3], targets)
+            self.assertEqual([distancer.getDistances(source, targets) for source in cells[:3]],
+                    table)
+
+            self.assertEqual((None, None), distancer.nearest(cells[0], []))
+
+            for source in cells[::13]:
+                for target in cells[::3]:
+                    self.assertEqual(distancer.getDistance(source, target),
+                            distancer.getDistanceById(layout.cellId(*source), layout.cellId(*target)))
+
+if __name__ == '__main__':
+    unittest.main()
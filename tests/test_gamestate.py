@@ -0,0 +1,265 @@
+import os
+import pickle
+import random
+import subprocess
+import sys
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import getLayout
+
+MAX_MOVES = 300
+
+"""
+Test the game state mechanics shared by pacman and capture.
+"""
+class GameStateTest(unittest.TestCase):
+    def _randomPlay(self, state, seed):
+        rng = random.Random(seed)
+        states = [state]
+
+        agentIndex = 0
+        for i in range(MAX_MOVES):
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            state = state.generateSuccessor(agentIndex, action)
+            states.append(state)
+
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        return states
+
+    def _checkZobrist(self, states):
+        for state in states:
+            self.assertEqual(state._computeZobrist(), state._zobrist)
+            self.assertEqual(state._food.count(), state.getNumFood())
+
+            if (isinstance(state, CaptureGameState)):
+                self.assertEqual(state.getRedFood().count(), state.getNumRedFood())
+                self.assertEqual(state.getBlueFood().count(), state.getNumBlueFood())
+
+        # A state must hash the same as an equal state that was reached a different way.
+        initial = states[0]
+        self.assertEqual(hash(initial), hash(initial._initSuccessor()))
+
+    def test_pacman_zobrist(self):
+        layout = getLayout('smallClassic')
+        for seed in range(5):
+            self._checkZobrist(self._randomPlay(PacmanGameState(layout), seed))
+
+    def test_capture_zobrist(self):
+        layout = getLayout('defaultCapture')
+        for seed in range(3):
+            self._checkZobrist(self._randomPlay(CaptureGameState(layout, MAX_MOVES), seed))
+
+    def _agentFields(self, state):
+        return [(agentState.getPosition(), agentState.getDirection(),
+                agentState.isPacman(), agentState.getScaredTimer())
+                for agentState in state.getAgentStates()]
+
+    def _checkSharedAgents(self, state, seed):
+        rng = random.Random(seed)
+        history = []
+
+        agentIndex = 0
+        for i in range(MAX_MOVES):
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            successor = state.generateSuccessor(agentIndex, action)
+
+            # Agents that did not move are shared with the parent.
+            for otherIndex in range(state.getNumAgents()):
+                if (successor.getAgentState(otherIndex) != state.getAgentState(otherIndex)):
+                    self.assertIsNot(successor.getAgentState(otherIndex),
+                            state.getAgentState(otherIndex))
+
+            # Walking a copy of the state with apply/undo must not touch shared agents either.
+            walker = successor._initSuccessor()
+            if (not walker.isOver()):
+                nextIndex = (agentIndex + 1) % state.getNumAgents()
+                for nextAction in walker.getLegalActions(nextIndex):
+                    walker.undo(walker.applyAction(nextIndex, nextAction))
+
+            history.append((state, self._agentFields(state)))
+            state = successor
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        for (oldState, fields) in history:
+            self.assertEqual(fields, self._agentFields(oldState))
+
+    def test_pacman_shared_agents(self):
+        layout = getLayout('smallClassic')
+        for seed in range(3):
+            self._checkSharedAgents(PacmanGameState(layout), seed)
+
+    def test_capture_shared_agents(self):
+        layout = getLayout('defaultCapture')
+        for seed in range(3):
+            self._checkSharedAgents(CaptureGameState(layout, MAX_MOVES), seed)
+
+    def _checkGenerateSuccessors(self, state, seed):
+        rng = random.Random(seed)
+
+        agentIndex = 0
+        for i in range(MAX_MOVES):
+            if (state.isOver()):
+                break
+
+            legal = state.getLegalActions(agentIndex)
+            successors = state.generateSuccessors(agentIndex)
+
+            self.assertEqual(legal, [action for (action, successor) in successors])
+            for (action, successor) in successors:
+                expected = state.generateSuccessor(agentIndex, action)
+                self.assertEqual(expected, successor)
+                self.assertEqual(expected.getScore(), successor.getScore())
+
+            subset = legal[-1:]
+            self.assertEqual(subset,
+                    [action for (action, successor) in state.generateSuccessors(agentIndex, subset)])
+
+            state = rng.choice(successors)[1]
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_pacman_generate_successors(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        self._checkGenerateSuccessors(state, 0)
+
+        with self.assertRaises(ValueError):
+            state.generateSuccessors(0, ['Bogus'])
+
+    def test_capture_generate_successors(self):
+        state = CaptureGameState(getLayout('defaultCapture'), MAX_MOVES)
+        self._checkGenerateSuccessors(state, 0)
+
+        with self.assertRaises(ValueError):
+            state.generateSuccessors(1, ['Bogus'])
+
+    def test_food_in_cell(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        layout = state.getInitialLayout()
+
+        (x, y) = state.getFood().asList()[0]
+        state.eatFood(x, y)
+
+        for (cellId, (x, y)) in enumerate(layout.getCells()):
+            self.assertEqual(state.hasFood(x, y), state.hasFoodInCell(cellId))
+
+    def test_food_view(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        food = state.getFood()
+        self.assertIs(food, state.getFood())
+
+        copy = state.getFoodCopy()
+        (x, y) = copy.asList()[0]
+        copy[x][y] = False
+        self.assertTrue(food[x][y])
+
+        # Eating food leaves views that were already handed out alone.
+        state.eatFood(x, y)
+        self.assertTrue(food[x][y])
+        self.assertFalse(state.getFood()[x][y])
+        self.assertEqual(food.count() - 1, state.getFood().count())
+
+    def _checkApplyUndo(self, state, seed):
+        rng = random.Random(seed)
+        original = state._initSuccessor()
+
+        tokens = []
+        successors = []
+
+        agentIndex = 0
+        for i in range(MAX_MOVES):
+            if (state.isOver()):
+                break
+
+            action = rng.choice(state.getLegalActions(agentIndex))
+            expected = state.generateSuccessor(agentIndex, action)
+
+            tokens.append(state.applyAction(agentIndex, action))
+            successors.append(expected)
+
+            self.assertEqual(expected, state)
+            self.assertEqual(hash(expected), hash(state))
+            self.assertEqual(expected.getNumFood(), state.getNumFood())
+
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        # Unwind back to the start, checking every intermediate state along the way.
+        successors.pop()
+        while (len(tokens) > 0):
+            state.undo(tokens.pop())
+
+            if (len(successors) > 0):
+                self.assertEqual(successors.pop(), state)
+
+        self.assertEqual(original, state)
+        self.assertEqual(hash(original), hash(state))
+        self.assertEqual(original.getCapsules(), state.getCapsules())
+        self.assertEqual(original.getNumFood(), state.getNumFood())
+
+    def test_undo_capsules(self):
+        state = PacmanGameState(getLayout('mediumClassic'))
+        capsules = list(state.getCapsules())
+
+        # The state owns a copy of its capsules after eating one.
+        state.eatCapsule(*capsules[0])
+
+        token = state.applyAction(0, state.getLegalActions(0)[0])
+        successor = state.generateSuccessor(1, state.getLegalActions(1)[0])
+        state.undo(token)
+
+        # The restored capsules are shared with the successor, so eating one must not leak.
+        state.eatCapsule(*capsules[1])
+        self.assertIn(capsules[1], successor.getCapsules())
+        self.assertNotIn(capsules[1], state.getCapsules())
+
+    def test_pickle_other_process(self):
+        # Another process that used a Zobrist key first still derives the same keys.
+        script = '; '.join([
+            'import pickle, sys',
+            'from pacai.util import util',
+            'util.zobristKey("unrelated")',
+            'from pacai.bin.pacman import PacmanGameState',
+            'from pacai.core.layout import getLayout',
+            'state = PacmanGameState(getLayout("smallClassic"))',
+            'state = state.generateSuccessor(0, state.getLegalActions(0)[0])',
+            'sys.stdout.buffer.write(pickle.dumps(state))',
+        ])
+
+        root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+        environment = dict(os.environ, PYTHONPATH = root)
+        output = subprocess.run([sys.executable, '-c', script], env = environment,
+                check = True, stdout = subprocess.PIPE).stdout
+
+        state = PacmanGameState(getLayout('smallClassic'))
+        state = state.generateSuccessor(0, state.getLegalActions(0)[0])
+
+        loaded = pickle.loads(output)
+        self.assertEqual(loaded._computeZobrist(), loaded._zobrist)
+        self.assertEqual(state._zobrist, loaded._zobrist)
+
+    def test_pacman_apply_undo(self):
+        layout = getLayout('smallClassic')
+        for seed in range(3):
+            self._checkApplyUndo(PacmanGameState(layout), seed)
+
+    def test_capture_apply_undo(self):
+        layout = getLayout('defaultCapture')
+        for seed in range(3):
+            state = CaptureGameState(layout, MAX_MOVES)
+            redFood = state.getNumRedFood()
+
+            self._checkApplyUndo(state, seed)
+
+            self.assertEqual(redFood, state.getNumRedFood())
+            self.assertEqual(redFood, state.getRedFood().count())
+            self.assertEqual(MAX_MOVES, state.getTimeleft())
+
+if __name__ == '__main__':
+    unittest.main()
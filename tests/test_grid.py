@@ -0,0 +1,136 @@
+import pickle
+import unittest
+
+from pacai.core.grid import Grid
+from pacai.core.grid import GridView
+
+"""
+Test the bitboard-backed grid.
+"""
+class GridTest(unittest.TestCase):
+    def test_read_write(self):
+        grid = Grid(4, 3)
+        self.assertFalse(grid[2][1])
+
+        grid[2][1] = True
+        self.assertTrue(grid[2][1])
+        self.assertEqual(1, grid.count())
+        self.assertEqual(11, grid.count(False))
+
+        grid[2][1] = False
+        self.assertFalse(grid[2][1])
+        self.assertEqual(0, grid.count())
+
+        full = Grid(4, 3, initialValue = True)
+        self.assertEqual(12, full.count())
+        self.assertTrue(full[3][2])
+
+    def test_copy_on_write(self):
+        grid = Grid(5, 5)
+        grid[1][1] = True
+        grid[3][4] = True
+
+        copy = grid.copy()
+        self.assertEqual(grid, copy)
+        self.assertEqual(hash(grid), hash(copy))
+
+        copy[1][1] = False
+        self.assertTrue(grid[1][1])
+        self.assertFalse(copy[1][1])
+        self.assertEqual(2, grid.count())
+        self.assertEqual(1, copy.count())
+        self.assertNotEqual(grid, copy)
+
+    def test_as_list(self):
+        grid = Grid(3, 4)
+        positions = [(0, 3), (1, 0), (2, 2), (2, 3)]
+        for (x, y) in reversed(positions):
+            grid[x][y] = True
+
+        self.assertEqual(positions, grid.asList())
+        self.assertEqual(positions, list(grid.iterPositions()))
+        self.assertEqual(12 - len(positions), len(grid.asList(False)))
+
+    def test_cached_positions(self):
+        grid = Grid(3, 3)
+        grid[1][1] = True
+
+        positions = grid.asList()
+        positions.append((0, 0))
+        self.assertEqual([(1, 1)], grid.asList())
+        self.assertEqual(frozenset([(1, 1)]), grid.asSet())
+
+        grid[2][0] = True
+        self.assertEqual([(1, 1), (2, 0)], grid.asList())
+        self.assertEqual(frozenset([(1, 1), (2, 0)]), grid.asSet())
+
+    def test_view(self):
+        grid = Grid(3, 3)
+        grid[0][2] = True
+
+        view = GridView(grid)
+        self.assertTrue(view[0][2])
+        self.assertEqual(grid, view)
+        self.assertEqual(view, grid)
+        self.assertEqual(hash(grid), hash(view))
+        self.assertEqual([(0, 2)], view.asList())
+        self.assertEqual(1, view.count())
+
+        with self.assertRaises(TypeError):
+            view[0][2] = False
+
+        copy = view.copy()
+        copy[0][2] = False
+        self.assertTrue(view[0][2])
+        self.assertNotEqual(copy, view)
+
+    def test_hash(self):
+        # The hash matches the value the list-backed grid built cell by cell.
+        grid = Grid(3, 2)
+        grid[0][1] = True
+        grid[2][0] = True
+
+        self.assertEqual(hash((1 << 1) + (1 << 4)), hash(grid))
+
+    def test_set_column(self):
+        grid = Grid(2, 3)
+        grid[1] = [True, False, True]
+
+        self.assertEqual([(1, 0), (1, 2)], grid.asList())
+        self.assertEqual(2, grid.count())
+
+        # A column held from before it was replaced no longer writes into the grid.
+        column = grid[0]
+        grid[0] = [True, True, False]
+        column[0] = False
+
+        self.assertTrue(grid[0][0])
+        self.assertFalse(column[0])
+        self.assertEqual(4, grid.count())
+
+    def test_column_slice(self):
+        grid = Grid(2, 4)
+        grid[1][1:3] = [True, True]
+
+        self.assertEqual([False, True, True, False], grid[1])
+        self.assertEqual([(1, 1), (1, 2)], grid.asList())
+
+        grid[1][::3] = [True, True]
+        self.assertEqual(4, grid.count())
+
+        with self.assertRaises(ValueError):
+            grid[1][1:3] = [True]
+
+        self.assertEqual(4, grid.count())
+
+    def test_pickle(self):
+        grid = Grid(3, 3)
+        grid[1][2] = True
+        grid[0]
+
+        loaded = pickle.loads(pickle.dumps(grid))
+        self.assertEqual(grid, loaded)
+        self.assertTrue(loaded[1][2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pacai.core import layout as layoutModule
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.layout import DEFAULT_LAYOUT_DIR
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+LAYOUTS = ['tinyMaze', 'smallClassic', 'mediumClassic', 'defaultCapture']
+
+DIRECTIONS = [
+    Directions.NORTH,
+    Directions.SOUTH,
+    Directions.EAST,
+    Directions.WEST,
+    Directions.STOP,
+]
+
+"""
+Test the static information precomputed for layouts.
+"""
+class LayoutTest(unittest.TestCase):
+    def test_move_tables(self):
+        for name in LAYOUTS:
+            layout = getLayout(name)
+
+            for position in layout.walls.asList(False):
+                self.assertEqual(tuple(Actions.getLegalNeighbors(position, layout.walls)),
+                        layout.getLegalNeighbors(position))
+
+                for direction in DIRECTIONS:
+                    expected = Actions.getPossibleActions(position, direction, layout.walls)
+                    self.assertEqual(tuple(expected),
+                            layout.getPossibleActions(position, direction))
+
+                    reverse = Actions.reverseDirection(direction)
+                    expected = [action for action in expected if action != Directions.STOP]
+                    if (reverse in expected and len(expected) > 1):
+                        expected.remove(reverse)
+
+                    self.assertEqual(tuple(expected), layout.getGhostActions(position, direction))
+
+    def test_move_tables_off_grid(self):
+        layout = getLayout('smallClassic')
+        (x, y) = layout.agentPositions[1][1]
+
+        # Between grid points, agents must continue straight.
+        position = (x + 0.5, y)
+        self.assertEqual((Directions.EAST, ), layout.getPossibleActions(position, Directions.EAST))
+        self.assertEqual((Directions.EAST, ), layout.getGhostActions(position, Directions.EAST))
+
+        # Float positions on the grid use the table.
+        self.assertEqual(layout.getPossibleActions((x, y), Directions.STOP),
+                layout.getPossibleActions((float(x), float(y)), Directions.STOP))
+
+    def test_cell_ids(self):
+        for name in LAYOUTS:
+            layout = getLayout(name)
+            cells = layout.walls.asList(False)
+
+            self.assertEqual(cells, layout.getCells())
+            self.assertEqual(len(cells), layout.getNumCells())
+            self.assertIsNone(layout.cellId(0, 0))
+
+            for (cellId, (x, y)) in enumerate(cells):
+                self.assertEqual(cellId, layout.cellId(x, y))
+                self.assertEqual((x, y), layout.position(cellId))
+                self.assertEqual(x * layout.getHeight() + y, layout.getGridIndex(cellId))
+
+                neighbors = [neighbor for neighbor in layout.getLegalNeighbors((x, y))
+                        if neighbor != (x, y)]
+                self.assertEqual(neighbors,
+                        [layout.position(neighborId) for neighborId in layout.getNeighborIds(cellId)])
+
+                self.assertEqual(layout.getPossibleActions((x, y), Directions.STOP),
+                        layout.getCellActions(cellId))
+
+                expected = []
+                for action in Directions.CARDINAL:
+                    (dx, dy) = Actions.directionToVector(action)
+                    if (not layout.walls[int(x + dx)][int(y + dy)]):
+                        expected.append((action, (int(x + dx), int(y + dy))))
+
+                self.assertEqual(expected, [(action, layout.position(neighborId))
+                        for (action, neighborId) in layout.getCardinalMoves(cellId)])
+
+    def test_visibility(self):
+        layout = Layout([
+            '%%%%%%',
+            '%P. G%',
+            '%.%%.%',
+            '%....%',
+            '%%%%%%',
+        ])
+
+        pacman = (1, 3)
+        self.assertTrue(layout.isVisibleFrom((4, 3), pacman, Directions.EAST))
+        self.assertTrue(layout.isVisibleFrom((4.5, 3), pacman, Directions.EAST))
+        self.assertFalse(layout.isVisibleFrom((4, 3), pacman, Directions.WEST))
+        self.assertFalse(layout.isVisibleFrom((4, 3), pacman, Directions.STOP))
+        self.assertTrue(layout.isVisibleFrom(pacman, pacman, Directions.STOP))
+
+        # Walls block the view.
+        self.assertTrue(layout.isVisibleFrom((1, 1), pacman, Directions.SOUTH))
+        self.assertFalse(layout.isVisibleFrom((4, 1), (4, 3), Directions.NORTH))
+        self.assertTrue(layout.isVisibleFrom((4, 1), (4, 3), Directions.SOUTH))
+        self.assertFalse(layout.isVisibleFrom((2, 1), (2, 3), Directions.SOUTH))
+
+        # Layouts with the same walls share an index.
+        self.assertIs(layout.getVisibility(), Layout(layout.layoutText).getVisibility())
+
+        layoutModule.clearLayoutCache()
+
+    def _checkSameLayout(self, expected, layout):
+        self.assertEqual(expected.walls, layout.walls)
+        self.assertEqual(expected.food, layout.food)
+        self.assertEqual(expected.capsules, layout.capsules)
+        self.assertEqual(expected.agentPositions, layout.agentPositions)
+        self.assertEqual(expected.numGhosts, layout.numGhosts)
+        self.assertEqual(str(expected), str(layout))
+        self.assertEqual(expected._possibleActions, layout._possibleActions)
+
+    def test_cache(self):
+        layoutModule.clearLayoutCache()
+
+        layout = getLayout('mediumClassic')
+        self.assertIs(layout, getLayout('mediumClassic.lay'))
+        self.assertIsNot(layout, getLayout('mediumClassic', maxGhosts = 1))
+        self.assertEqual(1, getLayout('mediumClassic', maxGhosts = 1).getNumGhosts())
+
+        copy = layout.deepCopy()
+        self._checkSameLayout(layout, copy)
+        copy.food[1][1] = not copy.food[1][1]
+        self.assertNotEqual(layout.food, copy.food)
+
+        # The tables derived from the walls are not shared.
+        self.assertIsNot(layout._cellIds, copy._cellIds)
+        self.assertIsNot(layout._possibleActions, copy._possibleActions)
+
+    def test_compiled(self):
+        with tempfile.TemporaryDirectory() as layoutDir:
+            for name in LAYOUTS + ['capsuleClassic']:
+                textPath = os.path.join(layoutDir, name + '.lay')
+                shutil.copy(os.path.join(DEFAULT_LAYOUT_DIR, name + '.lay'), textPath)
+
+                compiledPath = layoutModule.compileLayout(textPath)
+                self.assertTrue(os.path.isfile(compiledPath))
+
+                for maxGhosts in [None, 0, 1]:
+                    expected = Layout(layoutModule._readLayoutText(textPath), maxGhosts)
+                    compiled = layoutModule._loadCompiledLayout(textPath, maxGhosts)
+                    self._checkSameLayout(expected, compiled)
+
+                # A compiled layout that is cut short is ignored.
+                with open(compiledPath, 'rb') as file:
+                    data = file.read()
+
+                with open(compiledPath, 'wb') as file:
+                    file.write(data[:40])
+
+                self.assertIsNone(layoutModule._loadCompiledLayout(textPath, None))
+
+                layoutModule.clearLayoutCache()
+                self._checkSameLayout(Layout(layoutModule._readLayoutText(textPath)),
+                        getLayout(name, layout_dir = layoutDir))
+
+                # A compiled layout that is older than the text is ignored.
+                layoutModule.compileLayout(textPath)
+                os.utime(compiledPath, (0, 0))
+                self.assertIsNone(layoutModule._loadCompiledLayout(textPath, None))
+
+            # Compiled layouts are moved into place, no temp files are left behind.
+            self.assertEqual([], [path for path in os.listdir(layoutDir) if path.endswith('.tmp')])
+
+            # A compiled layout that cannot be written is skipped.
+            textPath = os.path.join(layoutDir, 'unwritable.lay')
+            shutil.copy(os.path.join(DEFAULT_LAYOUT_DIR, 'tinyMaze.lay'), textPath)
+            os.mkdir(layoutModule._getCompiledPath(textPath))
+
+            with self.assertLogs(level = 'WARNING'):
+                self.assertIsNone(layoutModule.compileLayout(textPath))
+
+            # The temp file is cleaned up.
+            self.assertEqual([], [path for path in os.listdir(layoutDir) if path.endswith('.tmp')])
+
+            layoutModule.clearLayoutCache()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+import random
+import unittest
+
+from pacai.agents.search.base import SearchAgent
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distanceCalculator
+from pacai.core.directions import Directions
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.search import engine
+from pacai.core.search import heuristic
+from pacai.core.search import jumpPoint
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import SearchProblem
+from pacai.student import search
+
+class GraphSearchProblem(SearchProblem):
+    """
+    A search over an explicit graph: {state: [(successor, action, cost), ...]}.
+    """
+
+    def __init__(self, graph, start, goal):
+        super().__init__()
+
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+
+    def actionsCost(self, actions):
+        state = self.start
+        cost = 0
+
+        for action in actions:
+            for (successor, successorAction, stepCost) in self.graph[state]:
+                if (successorAction == action):
+                    state = successor
+                    cost += stepCost
+                    break
+
+        return cost
+
+    def isGoal(self, state):
+        return state == self.goal
+
+    def startingState(self):
+        return self.start
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+        return self.graph.get(state, [])
+
+"""
+Test the reference search engine.
+"""
+class SearchEngineTest(unittest.TestCase):
+    def test_position_costs(self):
+        for name in ['tinyMaze', 'mediumMaze', 'bigMaze', 'openMaze']:
+            state = PacmanGameState(getLayout(name))
+
+            expected = PositionSearchProblem(state)
+            expectedCost = expected.actionsCost(search.breadthFirstSearch(expected))
+
+            for function in [engine.bfs, engine.ucs, engine.astar]:
+                problem = PositionSearchProblem(state)
+                actions = function(problem)
+                self.assertEqual(expectedCost, problem.actionsCost(actions), name)
+
+            problem = PositionSearchProblem(state)
+            actions = engine.astar(problem, heuristic.manhattan)
+            self.assertEqual(expectedCost, problem.actionsCost(actions), name)
+            self.assertLessEqual(problem.getExpandedCount(), expected.getExpandedCount())
+
+            problem = PositionSearchProblem(state)
+            actions = engine.greedy(problem, heuristic.manhattan)
+            self.assertLess(problem.actionsCost(actions), 999999)
+
+    def test_food_costs(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        expected = FoodSearchProblem(state)
+        expectedCost = expected.actionsCost(search.uniformCostSearch(expected))
+
+        problem = FoodSearchProblem(state)
+        actions = engine.astar(problem, heuristic.numFood)
+        self.assertEqual(expectedCost, problem.actionsCost(actions))
+
+    def test_decrease_key(self):
+        # The direct edge to 'C' is found first, but the path through 'B' is cheaper.
+        graph = {
+            'A': [('C', 'AC', 10), ('B', 'AB', 1)],
+            'B': [('C', 'BC', 1)],
+            'C': [('D', 'CD', 1)],
+        }
+
+        problem = GraphSearchProblem(graph, 'A', 'D')
+        self.assertEqual(['AB', 'BC', 'CD'], engine.ucs(problem))
+        self.assertEqual(3, problem.getExpandedCount())
+
+        problem = GraphSearchProblem(graph, 'A', 'D')
+        self.assertEqual(['AC', 'CD'], engine.bfs(problem))
+
+    def test_ties(self):
+        # Equal priorities come out in the order they were found.
+        graph = {
+            'S': [('A', 'SA', 1), ('B', 'SB', 1)],
+            'A': [('G', 'AG', 1)],
+            'B': [('G', 'BG', 1)],
+        }
+
+        for function in [engine.bfs, engine.ucs, engine.astar]:
+            problem = GraphSearchProblem(graph, 'S', 'G')
+            self.assertEqual(['SA', 'AG'], function(problem))
+
+        self.assertEqual([], engine.ucs(GraphSearchProblem(graph, 'S', 'X')))
+
+    def test_bidirectional(self):
+        for name in ['tinyMaze', 'bigMaze', 'openMaze', 'bigSearch']:
+            state = PacmanGameState(getLayout(name))
+            cells = state.getWalls().asList(False)
+
+            for goal in cells[::max(1, len(cells) // 7)]:
+                expected = PositionSearchProblem(state, goal = goal)
+                expectedCost = expected.actionsCost(engine.ucs(expected))
+
+                problem = PositionSearchProblem(state, goal = goal)
+                actions = engine.bidirectional(problem)
+                self.assertEqual(expectedCost, problem.actionsCost(actions), (name, goal))
+
+                # Both sides are recorded.
+                self.assertEqual(problem.getExpandedCount(), len(problem.getVisitHistory()))
+
+        # The open layout only needs a fraction of the expansions.
+        state = PacmanGameState(getLayout('bigSearch'))
+        expected = PositionSearchProblem(state, goal = (29, 13))
+        engine.ucs(expected)
+
+        problem = PositionSearchProblem(state, goal = (29, 13))
+        engine.bidirectional(problem)
+        self.assertLess(problem.getExpandedCount(), expected.getExpandedCount() // 2)
+
+    def test_bidirectional_fallback(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+
+        # Moves that are not symmetric fall back to a one-sided search.
+        problem = PositionSearchProblem(state, costFn = lambda position: 2 ** position[0])
+        self.assertFalse(problem.isSymmetric())
+
+        expected = PositionSearchProblem(state, costFn = lambda position: 2 ** position[0])
+        self.assertEqual(expected.actionsCost(engine.ucs(expected)),
+                problem.actionsCost(engine.bidirectional(problem)))
+
+        # Without a single goal state.
+        graph = {
+            'S': [('A', 'SA', 1), ('B', 'SB', 1)],
+            'A': [('G', 'AG', 1)],
+        }
+
+        self.assertIsNone(GraphSearchProblem(graph, 'S', 'G').goalState())
+        self.assertEqual(['SA', 'AG'], engine.bidirectional(GraphSearchProblem(graph, 'S', 'G')))
+
+    def _checkJumpPoint(self, layout, pairs, rng):
+        state = PacmanGameState(layout)
+        matrix = distanceCalculator.computeDistanceMatrix(layout)
+        cells = layout.walls.asList(False)
+
+        for i in range(pairs):
+            start = rng.choice(cells)
+            goal = rng.choice(cells)
+
+            expected = matrix.getDistance(start, goal)
+            actions, expanded = jumpPoint.findPath(layout.walls, start, goal)
+
+            if (expected == distanceCalculator.UNREACHABLE_DISTANCE):
+                self.assertIsNone(actions)
+                continue
+
+            problem = PositionSearchProblem(state, start = start, goal = goal)
+            self.assertEqual(expected, problem.actionsCost(actions), (start, goal))
+
+    def test_jump_point(self):
+        rng = random.Random(140)
+
+        for name in ['tinyMaze', 'bigMaze', 'openMaze', 'openSearch', 'mediumClassic']:
+            self._checkJumpPoint(getLayout(name), 20, rng)
+
+        # Random walls make lots of forced turns.
+        for i in range(20):
+            width = rng.randint(4, 12)
+            height = rng.randint(4, 12)
+
+            rows = []
+            for y in range(height):
+                row = ''
+                for x in range(width):
+                    if (x in (0, width - 1) or y in (0, height - 1) or rng.random() < 0.3):
+                        row += '%'
+                    elif (x == 1 and y == 1):
+                        row += 'P'
+                    else:
+                        row += ' '
+
+                rows.append(row)
+
+            self._checkJumpPoint(Layout(rows), 10, rng)
+
+    def test_jump_point_expansions(self):
+        for name in ['openMaze', 'bigSearch']:
+            state = PacmanGameState(getLayout(name))
+
+            expected = PositionSearchProblem(state)
+            expectedCost = expected.actionsCost(engine.astar(expected, heuristic.manhattan))
+
+            problem = PositionSearchProblem(state)
+            actions = jumpPoint.jps(problem)
+            self.assertEqual(expectedCost, problem.actionsCost(actions))
+
+            # Only the jump points are expanded and highlighted.
+            self.assertGreater(problem.getExpandedCount(), 0)
+            self.assertLess(problem.getExpandedCount() * 3, expected.getExpandedCount())
+            self.assertEqual(problem.getExpandedCount(), len(problem.getVisitHistory()))
+
+    def test_search_agent(self):
+        state = PacmanGameState(getLayout('tinyMaze'))
+
+        agent = SearchAgent(0, fn = 'pacai.core.search.engine.astar',
+                heuristic = 'pacai.core.search.heuristic.manhattan')
+        agent.registerInitialState(state)
+
+        self.assertEqual(8, len(agent._actions))
+        self.assertEqual(Directions.SOUTH, agent.getAction(state))
+
+        agent = SearchAgent(0, fn = 'pacai.core.search.jumpPoint.jps')
+        agent.registerInitialState(state)
+        self.assertEqual(8, len(agent._actions))
+
+if __name__ == '__main__':
+    unittest.main()
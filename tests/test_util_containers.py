@@ -1,3 +1,4 @@
+import collections
 import unittest
 
 from pacai.util import priorityQueue
@@ -22,6 +23,25 @@ class UtilContainersTest(unittest.TestCase):
         for val in val_list:
             self.assertEqual(val, testQueue.pop())
 
+    def test_queue_deque(self):
+        # Pushing and popping are O(1) on both ends of a deque.
+        testQueue = queue.Queue()
+        self.assertIsInstance(testQueue.list, collections.deque)
+
+        # Interleaved pushes and pops keep FIFO order.
+        testQueue.push(1)
+        testQueue.push(2)
+        self.assertEqual(1, testQueue.pop())
+
+        testQueue.push(3)
+        self.assertEqual(2, len(testQueue))
+        self.assertEqual(2, testQueue.pop())
+        self.assertEqual(3, testQueue.pop())
+        self.assertTrue(testQueue.isEmpty())
+
+        with self.assertRaises(IndexError):
+            testQueue.pop()
+
     def test_stack(self):
         testStack = stack.Stack()
         self.assertTrue(testStack.isEmpty())
@@ -36,6 +56,24 @@ class UtilContainersTest(unittest.TestCase):
         for val in reversed(val_list):
             self.assertEqual(val, testStack.pop())
 
+    def test_stack_deque(self):
+        testStack = stack.Stack()
+        self.assertIsInstance(testStack.list, collections.deque)
+
+        # Interleaved pushes and pops keep LIFO order.
+        testStack.push(1)
+        testStack.push(2)
+        self.assertEqual(2, testStack.pop())
+
+        testStack.push(3)
+        self.assertEqual(2, len(testStack))
+        self.assertEqual(3, testStack.pop())
+        self.assertEqual(1, testStack.pop())
+        self.assertTrue(testStack.isEmpty())
+
+        with self.assertRaises(IndexError):
+            testStack.pop()
+
     def test_priority_queue(self):
         testPriorityQueue = priorityQueue.PriorityQueue()
         self.assertTrue(testPriorityQueue.isEmpty())
@@ -52,5 +90,62 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_priority_queue_ties(self):
+        testPriorityQueue = priorityQueue.PriorityQueue()
+
+        # Equal priorities come out in insertion order, and the items are never compared.
+        items = [{'id': x} for x in range(5)]
+        for item in items:
+            testPriorityQueue.push(item, 0)
+
+        for item in items:
+            self.assertIs(item, testPriorityQueue.pop())
+
+    def test_indexed_priority_queue(self):
+        testPriorityQueue = priorityQueue.IndexedPriorityQueue()
+        self.assertTrue(testPriorityQueue.isEmpty())
+
+        for (val, pri) in [('a', 5), ('b', 3), ('c', 8), ('d', 3)]:
+            testPriorityQueue.push(val, pri)
+
+        self.assertEqual(4, len(testPriorityQueue))
+        self.assertTrue(testPriorityQueue.contains('c'))
+        self.assertFalse(testPriorityQueue.contains('e'))
+
+        testPriorityQueue.decreaseKey('c', 1)
+        self.assertEqual(1, testPriorityQueue.getPriority('c'))
+        self.assertEqual(1, testPriorityQueue.peekPriority())
+        self.assertEqual(4, len(testPriorityQueue))
+
+        with self.assertRaises(ValueError):
+            testPriorityQueue.decreaseKey('a', 6)
+
+        # Pushing a waiting item keeps the lower priority instead of adding a duplicate.
+        testPriorityQueue.push('a', 9)
+        testPriorityQueue.push('d', 2)
+        self.assertEqual(4, len(testPriorityQueue))
+
+        self.assertEqual(['c', 'd', 'b', 'a'],
+                [testPriorityQueue.pop() for i in range(4)])
+        self.assertTrue(testPriorityQueue.isEmpty())
+        self.assertFalse(testPriorityQueue.contains('c'))
+
+    def test_indexed_priority_queue_order(self):
+        testPriorityQueue = priorityQueue.IndexedPriorityQueue()
+
+        priorities = [(x * 7) % 31 for x in range(100)]
+        for (val, pri) in enumerate(priorities):
+            testPriorityQueue.push(val, pri)
+
+        for val in range(0, 100, 3):
+            testPriorityQueue.decreaseKey(val, testPriorityQueue.getPriority(val) - 10)
+
+        popped = []
+        while (not testPriorityQueue.isEmpty()):
+            popped.append(testPriorityQueue.pop())
+
+        expected = sorted(range(100), key = lambda val: (priorities[val] - (10 * (val % 3 == 0))))
+        self.assertEqual(expected, popped)
+
 if __name__ == '__main__':
     unittest.main()